@@ -0,0 +1,224 @@
+"""
+Measure how dNWA.py scales with the size of the input and write the results as JSON.
+
+For every size a synthetic input is written with generate_input.py and these phases are timed:
+convertInput(), scorematrix() and traceback() for a sample of pairs, and the end-to-end run
+of main(). The best time of the repetitions is reported with the matrix cells per second,
+the alignments per second and the peak memory.
+
+Example:
+    python benchmarks/benchmark.py --sizes 2x10x200,4x10x500 --output results.json
+"""
+
+# import modules
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dNWA
+import generate_input
+
+def parseSize(size):
+    """Return (clusters, accessions, length) from a size like 4x10x500."""
+    try:
+        clusters, accessions, length = (int(value) for value in size.split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError('size must be CLUSTERSxACCESSIONSxLENGTH, like 4x10x500, '
+                                         'not ' + size) from None
+    if clusters < 1 or accessions < 1 or length < 1:
+        raise argparse.ArgumentTypeError('all values of a size must be at least 1: ' + size)
+    return clusters, accessions, length
+
+def bestTime(function,repeat):
+    """Call function repeat times and return the shortest wall time and its result."""
+    best = None
+    result = None
+    for run in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def peakMemory(function):
+    """Return the peak of the memory allocated by Python while function runs, in bytes."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def maxRSS():
+    """Return the maximal resident set size of this process in bytes, None if unknown."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return rss
+    return rss * 1024
+
+def samplePairs(list_with_all_sequences,number_of_pairs):
+    """Return up to number_of_pairs pairs of different sequences, in the order of the output."""
+    pairs = []
+    for i in range(len(list_with_all_sequences)):
+        for j in range(i+1, len(list_with_all_sequences)):
+            if len(pairs) == number_of_pairs:
+                return pairs
+            pairs.append((list_with_all_sequences[i], list_with_all_sequences[j]))
+    return pairs
+
+def alignPairs(pairs):
+    """Fill the score matrix and trace back every pair, return the times and the cells."""
+    scorematrix_time = 0.0
+    traceback_time = 0.0
+    cells = 0
+    for seq1, seq2 in pairs:
+        length1 = len(seq1.labels)
+        length2 = len(seq2.labels)
+        start = time.perf_counter()
+        matrix = dNWA.computeScorematrix(length1, length2, seq1.labels, seq2.labels)
+        middle = time.perf_counter()
+        dNWA.traceback(seq1.name, seq2.name, seq1.labels, seq2.labels, matrix)
+        end = time.perf_counter()
+        scorematrix_time = scorematrix_time + middle - start
+        traceback_time = traceback_time + end - middle
+        cells = cells + (length1+1) * (length2+1)
+    return scorematrix_time, traceback_time, cells
+
+def matrixPhases(aligner,list_with_all_sequences,number_of_pairs):
+    """Return the best times of scorematrix() and traceback() and the cells of the pairs."""
+    pairs = samplePairs(list_with_all_sequences, number_of_pairs)
+    aligner.call(dNWA.internLabels, list_with_all_sequences)
+    return aligner.call(alignPairs, pairs)
+
+def runMain(path,options):
+    """Run dNWA.main() on path in an empty directory and return the number of alignments."""
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            with open(os.devnull, 'w', encoding="utf-8") as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    dNWA.main([path] + options)
+        except SystemExit as e:
+            raise RuntimeError('dNWA.py stopped with exit code ' + str(e.code)) from None
+        finally:
+            os.chdir(cwd)
+    # the counters are set to zero at the start of every run
+    return dNWA.number_of_alignments
+
+def benchmarkSize(size,directory,options):
+    """Generate the input of size, run all phases and return the results as dict."""
+    clusters, accessions, length = size
+    path = os.path.join(directory, 'input_%dx%dx%d.txt' % size)
+    with open(path, 'w', encoding="utf-8") as outfile:
+        number_of_sequences = generate_input.generateFile(
+            outfile, clusters, accessions, length, length/5, 10, options.domains, 4, 20,
+            max(1, length//50), options.seed)
+    result = {'clusters': clusters, 'accessions_per_cluster': accessions,
+              'length_mean': length, 'sequences': number_of_sequences}
+
+    # convertInput()
+    aligner = dNWA.Aligner(filename=path, engine=options.engine)
+    convert_time, list_with_all_sequences = bestTime(
+        lambda: aligner.call(dNWA.convertInput), options.repeat)
+    result['convertInput'] = {'seconds': convert_time,
+                              'sequences_per_second': number_of_sequences / convert_time}
+
+    # scorematrix() and traceback() of a sample of pairs
+    best_scorematrix = None
+    best_traceback = None
+    for run in range(options.repeat):
+        scorematrix_time, traceback_time, cells = matrixPhases(
+            aligner, list_with_all_sequences, options.pairs)
+        if best_scorematrix is None or scorematrix_time < best_scorematrix:
+            best_scorematrix = scorematrix_time
+        if best_traceback is None or traceback_time < best_traceback:
+            best_traceback = traceback_time
+    number_of_pairs = len(samplePairs(list_with_all_sequences, options.pairs))
+    result['scorematrix'] = {'pairs': number_of_pairs, 'cells': cells,
+                             'seconds': best_scorematrix,
+                             'cells_per_second': cells / best_scorematrix if cells else None}
+    result['traceback'] = {'pairs': number_of_pairs, 'seconds': best_traceback,
+                           'pairs_per_second': number_of_pairs / best_traceback
+                           if number_of_pairs else None}
+
+    # end-to-end main()
+    dnwa_options = options.options.split()
+    main_time, number_of_alignments = bestTime(lambda: runMain(path, dnwa_options),
+                                               options.repeat)
+    result['main'] = {'options': dnwa_options, 'alignments': number_of_alignments,
+                      'seconds': main_time, 'pairs_per_second': number_of_alignments / main_time}
+    if not options.no_memory:
+        result['main']['peak_traced_bytes'] = peakMemory(lambda: runMain(path, dnwa_options))
+    result['max_rss_bytes'] = maxRSS()
+    return result
+
+def main(argv=None):
+    """Parse the options, run the benchmarks and write the JSON file."""
+    parser = argparse.ArgumentParser(
+        description='Measure how dNWA.py scales with the size of the input.')
+    parser.add_argument('--sizes', help='comma-separated sizes CLUSTERSxACCESSIONSxLENGTH '
+                        '(default 2x5x100,4x5x200,4x10x400)', default='2x5x100,4x5x200,4x10x400')
+    parser.add_argument('--repeat', help='repetitions of every phase, the best time is reported '
+                        '(default 3)', type=int, default=3)
+    parser.add_argument('--pairs', help='number of pairs for scorematrix() and traceback() '
+                        '(default 20)', type=int, default=20)
+    parser.add_argument('--domains', help='mean number of domains per sequence (default 4)',
+                        type=float, default=4)
+    parser.add_argument('--engine', help='engine of dNWA.py for scorematrix() (default python)',
+                        choices=['python', 'numpy', 'runlength'], default='python')
+    parser.add_argument('--options', help='options of dNWA.py for the end-to-end run, '
+                        'like --options="-g --jobs 4"', default='')
+    parser.add_argument('--no-memory', help='do not measure the peak memory, which needs an '
+                        'additional, slower run of main() with tracemalloc', action='store_true')
+    parser.add_argument('--seed', help='seed of the generated inputs (default 0)', type=int,
+                        default=0)
+    parser.add_argument('--output', help='JSON file for the results, standard output if not given')
+    options = parser.parse_args(argv)
+    if options.repeat < 1 or options.pairs < 1:
+        parser.error('--repeat and --pairs must be at least 1')
+    try:
+        sizes = [parseSize(size) for size in options.sizes.split(',')]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if options.engine != 'python':
+        options.options = options.options + ' --engine ' + options.engine
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            print('benchmark %dx%dx%d' % size, file=sys.stderr)
+            results.append(benchmarkSize(size, directory, options))
+
+    report = {'python': platform.python_version(), 'implementation':
+              platform.python_implementation(), 'platform': platform.platform(),
+              'processor': platform.processor(), 'cpus': os.cpu_count(),
+              'repeat': options.repeat, 'engine': options.engine, 'seed': options.seed,
+              'results': results}
+    if options.output:
+        with open(options.output, 'w', encoding="utf-8") as outfile:
+            json.dump(report, outfile, indent=2)
+            outfile.write('\n')
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
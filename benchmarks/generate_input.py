@@ -0,0 +1,119 @@
+"""
+Write a synthetic DomainMapper file for benchmarks of dNWA.py.
+
+Every cluster gets a domain architecture and its accessions are variants of it, with shifted
+domain boundaries, lost domains and changed F-IDs, so that the pairs of a cluster align close
+to the diagonal like the sequences of real clusters.
+"""
+
+# import modules
+import argparse
+import random
+import sys
+
+def randomFID(rng,depth,families):
+    """Return a random F-ID with depth levels, the first level is one of families."""
+    levels = [str(rng.randint(1, families))]
+    for level in range(1, depth):
+        levels.append(str(rng.randint(1, 3)))
+    return '.'.join(levels)
+
+def sequenceLength(rng,length_mean,length_sd,length_min):
+    """Return a sequence length from a normal distribution, at least length_min."""
+    return max(length_min, int(round(rng.gauss(length_mean, length_sd))))
+
+def clusterArchitecture(rng,length,domains,depth,families):
+    """
+    Return the domains of a cluster as list of (start, end, F-ID) for a sequence of length.
+
+    The number of domains is drawn around domains, the domains do not overlap.
+    """
+    number_of_domains = max(1, int(round(rng.gauss(domains, domains/3))))
+    number_of_domains = min(number_of_domains, (length+1)//2)
+    bounds = sorted(rng.sample(range(length+1), 2*number_of_domains))
+    return [(bounds[k], bounds[k+1], randomFID(rng, depth, families))
+            for k in range(0, len(bounds), 2)]
+
+def accessionVariant(rng,architecture,length,jitter):
+    """
+    Return the length and the domains of an accession derived from its cluster architecture.
+
+    The boundaries move by up to jitter positions, a domain is lost with probability 0.1 and
+    the last level of its F-ID changes with probability 0.1. Every accession keeps at least
+    one domain.
+    """
+    variant_length = max(1, length + rng.randint(-jitter, jitter))
+    domains = []
+    position = 0
+    for start, end, fid in architecture:
+        if rng.random() < 0.1:
+            continue
+        start = max(position, min(variant_length, start + rng.randint(-jitter, jitter)))
+        end = max(start, min(variant_length, end + rng.randint(-jitter, jitter)))
+        if end == start:
+            continue
+        if rng.random() < 0.1:
+            levels = fid.split('.')
+            levels[-1] = str(int(levels[-1]) % 3 + 1)
+            fid = '.'.join(levels)
+        domains.append((start, end, fid))
+        position = end
+    # keep one domain, dNWA.py stops at pairs of sequences without domains
+    if not domains and architecture:
+        start, end, fid = architecture[0]
+        start = min(start, variant_length-1)
+        domains.append((start, max(start+1, min(end, variant_length)), fid))
+    return variant_length, domains
+
+def generateFile(outfile,clusters,accessions,length_mean,length_sd,length_min,
+                 domains,depth,families,jitter,seed):
+    """Write clusters with accessions each to outfile, return the number of accessions."""
+    rng = random.Random(seed)
+    number_of_accessions = 0
+    for cluster in range(clusters):
+        length = sequenceLength(rng, length_mean, length_sd, length_min)
+        architecture = clusterArchitecture(rng, length, domains, depth, families)
+        outfile.write('>ClusID ' + str(cluster) + '; #Accessions ' + str(accessions)
+                      + '; Structural_annotation L\n')
+        for index in range(accessions):
+            variant_length, variant_domains = accessionVariant(rng, architecture, length, jitter)
+            parts = ['SYN%05d_%04d.1' % (cluster, index), '(0,0,START)']
+            parts.extend('(%d,%d,%s)' % domain for domain in variant_domains)
+            parts.append('(%d,%d,END)' % (variant_length, variant_length))
+            outfile.write(' '.join(parts) + '\n')
+            number_of_accessions = number_of_accessions + 1
+    return number_of_accessions
+
+def main(argv=None):
+    """Parse the options and write the file."""
+    parser = argparse.ArgumentParser(
+        description='Write a synthetic DomainMapper file for benchmarks of dNWA.py.')
+    parser.add_argument('output', nargs='?', help='output file, standard output if not given')
+    parser.add_argument('--clusters', help='number of clusters', type=int, default=2)
+    parser.add_argument('--accessions', help='accessions per cluster', type=int, default=10)
+    parser.add_argument('--length-mean', help='mean sequence length', type=float, default=500)
+    parser.add_argument('--length-sd', help='standard deviation of the sequence length',
+                        type=float, default=100)
+    parser.add_argument('--length-min', help='minimal sequence length', type=int, default=10)
+    parser.add_argument('--domains', help='mean number of domains per sequence',
+                        type=float, default=4)
+    parser.add_argument('--depth', help='levels of the F-IDs (1 to 4)', type=int, default=4,
+                        choices=[1, 2, 3, 4])
+    parser.add_argument('--families', help='number of different first levels of the F-IDs',
+                        type=int, default=20)
+    parser.add_argument('--jitter', help='maximal shift of the domain boundaries of an accession',
+                        type=int, default=10)
+    parser.add_argument('--seed', help='seed of the random numbers', type=int, default=0)
+    options = parser.parse_args(argv)
+
+    arguments = (options.clusters, options.accessions, options.length_mean, options.length_sd,
+                 options.length_min, options.domains, options.depth, options.families,
+                 options.jitter, options.seed)
+    if options.output:
+        with open(options.output, 'w', encoding="utf-8") as outfile:
+            generateFile(outfile, *arguments)
+    else:
+        generateFile(sys.stdout, *arguments)
+
+if __name__ == '__main__':
+    main()
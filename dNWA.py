@@ -3,21 +3,43 @@ Compute the optimal global alignment of two strings with NWA for all sequences i
 """
 
 # import modules
+import collections
+import gzip
+import hashlib
+import heapq
 import itertools
 import argparse
+import array
+import bisect
+import cProfile
+import gc
+import glob
+import json
 import math
+import multiprocessing
 import logging
 import re
 import os
+import shutil
+import sqlite3
 import time
 import sys
 
+# optional modules
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
 # global variable definitions
 number_of_alignments = 0
 number_of_lines_in_infile = 0
 number_of_lines_in_interfile = 0
 number_of_lines_in_outfile = 0
-number_of_zero_matches = 0
 try:
     timestamp = time.strftime("%Y%m%d-%H%M%S")
 except ValueError as v:
@@ -37,23 +59,113 @@ WEIGHT_MATCH_NO_FID = 0
 WEIGHT_MISMATCH_FIDS = -5
 WEIGHT_MISMATCH_NOFID_FID = -1
 
+# the default values in the order of option -s
+DEFAULT_WEIGHTS = (WEIGHT_MATCH_F_GROUP, WEIGHT_MATCH_T_GROUP, WEIGHT_MATCH_H_GROUP,
+                   WEIGHT_MATCH_X_GROUP, WEIGHT_MATCH_NO_FID, WEIGHT_MISMATCH_FIDS,
+                   WEIGHT_MISMATCH_NOFID_FID, PENALTY_GAP_OPENING, PENALTY_GAP_EXTENSION)
+
 # build pointer matrix for an alignment
 ptr_matrix = None
 
+# buffers of the score matrix and ptr_matrix that are reused for all pairs
+workspace = None
+
+# ClusIDs to align with for every ClusID (--within-cluster, --cluster-pairs), None for all pairs
+cluster_partners = None
+
+# a sequence of the input: name is ">clusID,accession", labels has one F-ID or '0' per position
+Sequence = collections.namedtuple('Sequence', ['name', 'labels', 'clusID', 'accession'])
+NO_FID_LABEL = '0'
+
+# patterns of the input file: the numbers of a description line and the domains like
+# (0,10,A.A.A.A) of an accession line, every match of DOMAIN_PATTERN is a whole entry
+HEADER_NUMBER_PATTERN = re.compile(r'\d+')
+DOMAIN_PATTERN = re.compile(r'(?:^| )\((\d+),(\d+),([^, ]*)\)(?= |$)')
+# number of characters read from the input file at a time
+INPUT_CHUNK_SIZE = 1048576
+
+# an alignment returned by Aligner: alignment1 and alignment2 are the labels of the first and
+# the second sequence with gaps, separated by commas (None with --score-only)
+Alignment = collections.namedtuple('Alignment', ['name1', 'name2', 'score', 'length',
+                                                 'normalized_score', 'alignment1', 'alignment2',
+                                                 'zero_matches'])
+
+# interned labels: maps every distinct F-ID (and '0') to an integer code,
+# score_table[code_i][code_j] holds the score of the label pair (None for an empty F-ID)
+label_codes = None
+label_list = None
+score_table = None
+has_empty_fid = False
+
+# score table as numpy array for the numpy engine
+score_table_array = None
+
+# number of alignments that a worker process of --jobs computes at once,
+# and the sequences of the input in a worker process
+JOB_CHUNK_SIZE = 16
+worker_sequences = None
+
+# writers for the alignment file and the verbose file,
+# raw and normalized score matrices of --matrix
+alignment_writer = None
+verbose_writer = None
+score_matrices = None
+
+# alignment cache of --cache, its records are committed every CACHE_COMMIT_INTERVAL stores
+alignment_cache = None
+CACHE_COMMIT_INTERVAL = 1000
+
+# Aligner of the files of a batch in this process
+batch_aligner = None
+
+# filter of --min-score and --top-k, number of alignments it left out
+score_filter = None
+number_of_filtered_alignments = 0
+
+# measurements of --metrics, None if it is not set
+metrics = None
+
+# progress of --checkpoint, None if it is not set
+checkpoint = None
+
+# tasks of --shard as (start, end, pairs, self-alignments, number of all tasks), None if not set
+shard_range = None
+
+# options that do not change the output files, a checkpoint can be resumed with other values
+CHECKPOINT_FREE_OPTIONS = ('log', 'engine', 'jobs', 'linearmemory', 'linearmemorythreshold',
+                           'banded', 'buffersize', 'cache', 'cachesize', 'metrics', 'profile',
+                           'checkpoint', 'checkpoint_interval')
+
+# pairs with more matrix cells are aligned in linear memory, regions of the
+# linear memory alignment with at most LINEAR_MEMORY_BLOCK_CELLS cells keep their pointers
+LINEAR_MEMORY_THRESHOLD = 25000000
+LINEAR_MEMORY_BLOCK_CELLS = 65536
+
+# the first band of --banded spans BAND_MIN_WIDTH diagonals or the longer sequence length
+# divided by BAND_WIDTH_DIVISOR on both sides
+BAND_MIN_WIDTH = 8
+BAND_WIDTH_DIVISOR = 32
+
+# phases of --metrics that fill score matrices, their time gives the cells per second
+MATRIX_PHASES = ('scorematrix', 'bandedAlignment', 'linearMemoryAlignment', 'scoreOnlyAlignment')
+
 # parsing arguments from command line
 parser = argparse.ArgumentParser(
     description='aligns all input sequences pairwise with a modified Needleman-Wunsch algorithm.',
     epilog='Generates two output files per default with provided filename at the end.'
     'Output format: >ClusID of seq1,accession of seq1,>ClusID of seq2,accession of seq2,'
-    'Alignmentscore, length of alignment'
+    'Alignmentscore, length of alignment. '
+    'Use "dNWA.py merge -h" to join the shards of --shard.'
     )
-parser.add_argument('filename', help='please provide an input file.')
+parser.add_argument('filename', nargs='+',
+                    help='please provide an input file, or several files, directories or glob '
+                    'patterns to align a batch of files, - reads the standard input.')
 parser.add_argument('-v', '--verbose',
                     help='writes a second output file that is more human-readable.',
                     action='store_true')
 parser.add_argument('-l', '--log', help='set loglevel',action='store', const='INFO', nargs='?',
                     choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'])
-parser.add_argument('-t', '--temp', help='keep temporary file with reformatted input',
+parser.add_argument('-t', '--temp', help='write the intermediate file with reformatted input',
                     action='store_true')
 parser.add_argument('-a','--noselfalignment', 
                     help='Deactivate the alignment of every sequence with itself',
@@ -63,162 +175,228 @@ parser.add_argument('-g','--gapextension',
                     action='store_true')
 parser.add_argument('-s','--score',help='provide a score after keyword -s', action='store',
                     nargs=9, type=int)
-args = parser.parse_args()
-
-# activate logging if --log is set. Set log level if provided, otherwise set INFO as default
-if args.log:
-    numeric_level = args.log
-    splitext_list = os.path.splitext(args.filename)
-    file_extension = splitext_list[1]
-    filename_wo_extension = os.path.basename(args.filename).replace(file_extension,'')
-    logging.basicConfig(filename=timestamp+ '_basic_log_'+ filename_wo_extension+ '.log',
-                        encoding='utf-8',
-                        filemode='w',
-                        format='%(levelname)s:%(message)s (%(asctime)s)',
-                        datefmt='%m/%d/%Y %I:%M:%S %p',
-                        level=numeric_level)
+parser.add_argument('--engine', help='engine for filling the score matrix, numpy requires numpy',
+                    action='store', choices=['python', 'numpy', 'runlength'], default='python')
+parser.add_argument('-j', '--jobs', help='number of worker processes for the alignments',
+                    action='store', type=int, default=1)
+parser.add_argument('--linearmemory', help='align all pairs in linear memory (slower)',
+                    action='store_true')
+parser.add_argument('--linearmemorythreshold',
+                    help='align pairs with more matrix cells than this in linear memory',
+                    action='store', type=int, default=LINEAR_MEMORY_THRESHOLD)
+parser.add_argument('--banded', help='align pairs in a diagonal band of the score matrix first',
+                    action='store_true')
+parser.add_argument('--buffersize', help='number of characters buffered before writing output',
+                    action='store', type=int, default=1048576)
+parser.add_argument('--compress', help='write the output files compressed with gzip',
+                    action='store_true')
+parser.add_argument('--nodeduplication',
+                    help='align sequences with identical domain labels separately',
+                    action='store_true')
+parser.add_argument('--cache', help='path of a file that caches alignments between runs',
+                    action='store')
+parser.add_argument('--cachesize', help='maximal number of alignments kept in the cache',
+                    action='store', type=int, default=1000000)
+parser.add_argument('--previous',
+                    help='alignment file of an earlier run, its alignments are not computed again',
+                    action='store')
+parser.add_argument('--within-cluster', help='align only sequences with the same ClusID',
+                    action='store_true')
+parser.add_argument('--cluster-pairs',
+                    help='file with pairs of ClusIDs, align only sequences of these clusters',
+                    action='store')
+parser.add_argument('--min-score',
+                    help='write only alignments with at least this normalized score',
+                    action='store', type=float)
+parser.add_argument('--top-k',
+                    help='write only pairs among the k best partners of one of their sequences',
+                    action='store', type=int)
+parser.add_argument('--matrix',
+                    help='write N x N matrices of the scores as .npy files, requires numpy',
+                    action='store_true')
+parser.add_argument('--score-only',
+                    help='write only the first line of every alignment, without the alignment',
+                    action='store_true')
+parser.add_argument('--metrics',
+                    help='write the time of every phase, the matrix cells and the peak memory '
+                    'into this JSON file', action='store')
+parser.add_argument('--profile', help='write cProfile statistics of the alignments into this file',
+                    action='store')
+parser.add_argument('--checkpoint',
+                    help='file that stores the progress of the run, a stopped run is resumed from it',
+                    action='store')
+parser.add_argument('--checkpoint-interval', help='seconds between two checkpoints (default 60)',
+                    action='store', type=float, default=60)
+parser.add_argument('--shard',
+                    help='align only shard K of N shards with about the same number of matrix '
+                    'cells, given as K/N; join the shards with "dNWA.py merge"', action='store')
+parser.add_argument('--stdout',
+                    help='write the alignments to the standard output as soon as they are '
+                    'computed, instead of the alignment file', action='store_true')
+
+# parsing arguments of the merge command
+merge_parser = argparse.ArgumentParser(
+    prog='dNWA.py merge',
+    description='joins the output files of all shards of --shard into the output files of a '
+    'run without --shard.')
+merge_parser.add_argument('shards', nargs='+',
+                          help='description files (<timestamp>_info_shardKofN_<input>.json) '
+                          'of all shards')
+merge_parser.add_argument('--metrics', help='write the added up metrics of the shards into this '
+                          'JSON file', action='store')
+# options of the current run, set by main() or by an Aligner
+args = None
+
+# input file name that reads the standard input and its name in the output file names
+STDIN_FILENAME = '-'
+STDIN_NAME = 'stdin'
+
+def parseArguments(argv=None):
+    """Parse the command line options, argv defaults to sys.argv."""
+    return parser.parse_args(argv)
+
+def setupLogging(log_name=None,filemode='w'):
+    """
+    Activate logging if --log is set. Set log level if provided, otherwise set INFO as default.
+
+    The log file is named after log_name, by default the input file without extension.
+    """
+    if args.log:
+        numeric_level = args.log
+        if log_name is None:
+            splitext_list = os.path.splitext(inputName())
+            file_extension = splitext_list[1]
+            log_name = inputName().replace(file_extension,'')
+        logging.basicConfig(filename=timestamp+ '_basic_log_'+ log_name+ '.log',
+                            encoding='utf-8',
+                            filemode=filemode,
+                            format='%(levelname)s:%(message)s (%(asctime)s)',
+                            datefmt='%m/%d/%Y %I:%M:%S %p',
+                            level=numeric_level)
 
 # define functions
-def convertInput():
+def inputName():
+    """Return the name of the input file in the names of the output files, stdin for -."""
+    if args.filename == STDIN_FILENAME:
+        return STDIN_NAME
+    return os.path.basename(args.filename)
+
+def parseInput(infile):
     """
-    Transform the given input into a format, that NWA can handle, and store it in a txt-file."""
+    Parse DomainMapper records from infile and yield them as Sequence.
 
-    # open input file and close it in the end
-    with open(args.filename, "r", encoding="utf-8") as infile:
-
-        # Initialize variables
-        clusID = None
-        cluster_count = 0
-        numberOfLinesRead = 0
-        totalAccessions = 0
-        counted_accessions = 0
-        global number_of_lines_in_infile
-        global number_of_lines_in_interfile
-        filename = timestamp+'_'+'formatted_input_'+os.path.basename(args.filename)
-
-        # Read the file line by line
-        line = infile.readline()
-        while line:
-            numberOfLinesRead = numberOfLinesRead +1
-
-            # Skip the iteration if the line is empty, but continue with the next iteration
-            if line == '':
-                continue
+    arguments:
+    infile -- open input file or stream
 
-            # if line contains cluster infos, store them
-            if line.startswith(">"):
-                if clusID is not None:
-                    if args.log:
-                        logging.info('The number of read lines, that should be accessions, '
-                                     'in cluster %s is %s.', str(clusID),str(counted_accessions))
-
-                # set counter variables
-                cluster_count = cluster_count+1
-                counted_accessions = 0
-
-                # If the line starts with ">", store the clusID in the clusID variable
-                # find all numbers in line and store them into a list of strings
-                temp = re.findall(r'\d+', line)
-                # map strings in list temp to int
-                numbersInLine = list(map(int, temp))
-                if len(numbersInLine) < 2:
-                    print('An error occured in convertInput(). The following description line is '
-                          'malformed: ',line)
-                    if args.log:
-                        logging.critical('An error occured in convertInput(). The following '
-                                         'description line is malformed: %s.',line)
-                    sys.exit(1)
-                # store clusID (first number)
-                clusID = numbersInLine[0]
-                # store number of sequences in the cluster
-                totalAccessions = numbersInLine[1]
+    Every accession line is expanded into one label per position, '0' for positions
+    without a protein domain.
+    """
+
+    # Initialize variables
+    clusID = None
+    cluster_count = 0
+    numberOfLinesRead = 0
+    totalAccessions = 0
+    counted_accessions = 0
+    global number_of_lines_in_infile
+    global number_of_lines_in_interfile
+
+    # Read the file line by line, in chunks of lines
+    for line in inputLines(infile):
+        numberOfLinesRead = numberOfLinesRead +1
+
+        # Skip the iteration if the line is empty, but continue with the next iteration
+        if line == '':
+            continue
+
+        # if line contains cluster infos, store them
+        if line.startswith(">"):
+            if clusID is not None:
                 if args.log:
-                    logging.info('The number of accessions in cluster %s is indicated in the file '
-                                 'as %s.',str(clusID),str(totalAccessions))
+                    logging.info('The number of read lines, that should be accessions, '
+                                 'in cluster %s is %s.', str(clusID),str(counted_accessions))
 
-            # else split the line into parts using the clusIDentifier as separator
-            # and write a transformed line into an intermediate file
-            else:
+            # set counter variables
+            cluster_count = cluster_count+1
+            counted_accessions = 0
 
-                #assertion, that cluster infos are provided
-                if clusID is None:
-                    if args.log:
-                        logging.error('Cluster clusID is empty.')
-                    print('A cluster clusID is empty, please check input file.')
+            # If the line starts with ">", store the clusID in the clusID variable
+            # find all numbers in line and store them into a list of strings
+            temp = HEADER_NUMBER_PATTERN.findall(line)
+            # map strings in list temp to int
+            numbersInLine = list(map(int, temp))
+            if len(numbersInLine) < 2:
+                print('An error occured in convertInput(). The following description line is '
+                      'malformed: ',line)
+                if args.log:
+                    logging.critical('An error occured in convertInput(). The following '
+                                     'description line is malformed: %s.',line)
+                sys.exit(1)
+            # store clusID (first number)
+            clusID = numbersInLine[0]
+            # store number of sequences in the cluster
+            totalAccessions = numbersInLine[1]
+            if args.log:
+                logging.info('The number of accessions in cluster %s is indicated in the file '
+                             'as %s.',str(clusID),str(totalAccessions))
+
+        # else split the line into parts using the clusIDentifier as separator
+        # and yield the transformed sequence
+        else:
 
-                # count variable for checking number of accessions
-                counted_accessions = counted_accessions+1
+            #assertion, that cluster infos are provided
+            if clusID is None:
+                if args.log:
+                    logging.error('Cluster clusID is empty.')
+                print('A cluster clusID is empty, please check input file.')
 
-                # stores the information of an accession in the list parts
-                # example format of parts: ['#accession', '(0,0,START)', '(0,1,FID)', '(1,1,END)']
-                parts = line.split(" ")
+            # count variable for checking number of accessions
+            counted_accessions = counted_accessions+1
 
-                # Check whether the input format has been complied with
-                if len(parts) < 3:
-                    s = ''.join(parts)
-                    print('An error occured in convertInput(). The following sequence '
-                          'representation is malformed: ',s)
-                    if args.log:
-                        logging.critical('An error occured in convertInput(). The following '
-                                         'sequence representation is malformed: %s.',s)
-                    sys.exit(1)
-                # extracts unique proteinID of sequence
-                first_entry = parts[0] # example format of first_entry: #accession
-                # extracts last entry of parts
-                last_entry = parts[-1] # example format of last_entry: (1,1,END)
-                # proteinID = first_entry
-
-                # store the length of the protein sequence, the x as found in (x,y,END)
-                parts_length = int(last_entry.split(',')[0][1:])
-
-                # Write the output to a file, for every sequence there are 2 lines
-                try:
-                    with open(filename, 'a', encoding="utf-8") as outfile:
-
-                        # Write the first line with "clusID,name of the sequence"
-                        # to store this info with the sequence
-                        outfile.write('>' + str(clusID) + ',' + first_entry + '\n')
-
-                        # declare array for the second line with zeros (as int)
-                        sequence_list = [0]* parts_length
-
-                        # Write the information of a domain into the list part to store it
-                        # example format of entry: (0,10,A.A.A.A)
-                        for entry in parts[2:-1]:
-                            part = entry.split(',') # example format of part: ['(0', '10', 'A.A.A.A)']
-                            # take the last item in the list part
-                            # without the last char (closing bracket)
-                            motif_number = part[-1][:-1] # example format of motif_number: A.A.A.A
-                            # store the first item in the list part (start of the protein domain)
-                            # but without the first char (opening bracket)
-                            first_number = int(part[0][1:])
-                            # store the second item in the list part (end of the protein domain)
-                            second_number = int(part[1])
-
-                        # write the domain F-FIDs into the sequence_list
-                            for index in range(first_number,second_number):
-                                sequence_list[index] = motif_number
-
-                        # write data into a file
-                        output_string = ','.join(map(str, sequence_list))
-                        outfile.write(output_string + '\n')
-                        # counter for logging purpose
-                        number_of_lines_in_interfile = number_of_lines_in_interfile+1
-
-                # handle exception
-                except ValueError as v:
-                    if args.log:
-                        logging.critical('Input file format error. ValueError in convertInput(): %s.',v)
-                    print("Input file format error. ValueError in convertInput():",v)
-                    sys.exit(1)
-                except IOError as e:
-                    if args.log:
-                        logging.critical('IOError in convertInput(): %s.',e)
-                    print("IOError in convertInput():",e)
-                    sys.exit(1)
+            # stores the information of an accession in the list parts
+            # example format of parts: ['#accession', '(0,0,START)', '(0,1,FID)', '(1,1,END)']
+            parts = line.split(" ")
 
-            # Read the next line
-            line = infile.readline()
+            # Check whether the input format has been complied with
+            if len(parts) < 3:
+                s = ''.join(parts)
+                print('An error occured in convertInput(). The following sequence '
+                      'representation is malformed: ',s)
+                if args.log:
+                    logging.critical('An error occured in convertInput(). The following '
+                                     'sequence representation is malformed: %s.',s)
+                sys.exit(1)
+            # extracts unique proteinID of sequence
+            first_entry = parts[0] # example format of first_entry: #accession
+            # extracts last entry of parts
+            last_entry = parts[-1] # example format of last_entry: (1,1,END)
+            # proteinID = first_entry
+
+            # store the length of the protein sequence, the x as found in (x,y,END)
+            parts_length = int(last_entry.split(',')[0][1:])
+
+            try:
+                # declare array with '0' for positions without protein domain
+                sequence_list = [NO_FID_LABEL]* parts_length
+
+                # Write the information of a domain into the list part to store it
+                fillDomains(sequence_list,parts[2:-1],parts_length)
+
+            # handle exception
+            except ValueError as v:
+                if args.log:
+                    logging.critical('Input file format error. ValueError in convertInput(): %s.',v)
+                print("Input file format error. ValueError in convertInput():",v)
+                sys.exit(1)
+
+            # a sequence of length 0 has one empty label, as in the intermediate file
+            if parts_length == 0:
+                sequence_list = ['']
+
+            # counter for logging purpose
+            number_of_lines_in_interfile = number_of_lines_in_interfile+1
+            yield Sequence('>' + str(clusID) + ',' + first_entry, sequence_list,
+                           clusID, first_entry)
 
     #store number global for checks
     number_of_lines_in_infile = numberOfLinesRead
@@ -244,27 +422,95 @@ def convertInput():
                              'file.')
         sys.exit(1)
 
-def readInput():
-    """Read the file into a list and return that list."""
-    filename = timestamp+'_'+'formatted_input_'+os.path.basename(args.filename)
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
+def inputLines(infile):
+    """Yield the lines of infile, read in chunks of about INPUT_CHUNK_SIZE characters."""
+    while True:
+        lines = infile.readlines(INPUT_CHUNK_SIZE)
+        if not lines:
+            return
+        yield from lines
+
+def fillDomains(sequence_list,domains,parts_length):
+    """
+    Write the F-IDs of the domains of an accession line into sequence_list.
+
+    arguments:
+    sequence_list -- list of parts_length labels
+    domains -- entries of the domains, example format of an entry: (0,10,A.A.A.A)
+    parts_length -- length of the sequence
+
+    If every entry is well-formed, the domains are matched in one pass and a domain within
+    the sequence fills its positions with one slice assignment. Other entries are written
+    position by position, so they raise the same errors as before.
+    """
+    matches = DOMAIN_PATTERN.findall(' '.join(domains))
+    if len(matches) == len(domains):
+        for first, second, motif_number in matches:
+            first_number = int(first)
+            second_number = int(second)
+            if first_number <= second_number <= parts_length:
+                sequence_list[first_number:second_number] = (
+                    [motif_number] * (second_number-first_number))
+            else:
+                for index in range(first_number,second_number):
+                    sequence_list[index] = motif_number
+        return
 
-            # read file into a list (with newlines); every line of the read file is one list entry
-            lines_from_file = f.readlines()
+    for entry in domains:
+        part = entry.split(',') # example format of part: ['(0', '10', 'A.A.A.A)']
+        # take the last item in the list part
+        # without the last char (closing bracket)
+        motif_number = part[-1][:-1] # example format of motif_number: A.A.A.A
+        # store the first item in the list part (start of the protein domain)
+        # but without the first char (opening bracket)
+        first_number = int(part[0][1:])
+        # store the second item in the list part (end of the protein domain)
+        second_number = int(part[1])
 
-            # strip newline from entries and store entries in a list
-            lines = [lines_from_file[x].strip('\n') for x in range(len(lines_from_file))]
+        # write the domain F-FIDs into the sequence_list
+        for index in range(first_number,second_number):
+            sequence_list[index] = motif_number
 
-            # read all transformed sequences into a 2D list
-            # so that NWA can align all of them in all combinations
-            list_with_all_sequences = [lines[i:i+2] for i in range(0, len(lines), 2)]
+def convertInput():
+    """
+    Transform the given input into a format, that NWA can handle, and return it as a list.
+
+    With --temp the transformed input is also stored in a txt-file.
+    """
+
+    # open input file and close it in the end
+    # the labels hold no reference cycles, so the garbage collector is paused while they are
+    # read instead of scanning the growing lists again and again
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if args.filename == STDIN_FILENAME:
+            list_with_all_sequences = timed('readInput',list,parseInput(sys.stdin))
+        else:
+            with open(args.filename, "r", encoding="utf-8") as infile:
+                list_with_all_sequences = timed('readInput',list,parseInput(infile))
+    finally:
+        if gc_enabled:
+            gc.enable()
 
-            return list_with_all_sequences
+    if args.temp:
+        writeTempFile(list_with_all_sequences)
+
+    return list_with_all_sequences
+
+def writeTempFile(list_with_all_sequences):
+    """Write the transformed input into the intermediate file, two lines for every sequence."""
+    filename = timestamp+'_'+'formatted_input_'+inputName()
+    try:
+        with open(filename, 'w', encoding="utf-8") as outfile:
+            for entry in list_with_all_sequences:
+                # Write the first line with "clusID,name of the sequence"
+                # to store this info with the sequence, and the labels in the second line
+                outfile.write(entry.name + '\n' + ','.join(entry.labels) + '\n')
     except IOError as e:
-        print("The intermediate file cannot be opened by readInput():",e)
         if args.log:
-            logging.critical('Error in function readInput().')
+            logging.critical('IOError in convertInput(): %s.',e)
+        print("IOError in convertInput():",e)
         sys.exit(1)
 
 def scoring(i,j):
@@ -333,33 +579,155 @@ def scoring(i,j):
             print("Something went wrong with scoring(), no score could be assigned.")
     return score
 
-def build_matrix(sequence_length1,sequence_length2):
+def isEmptyFID(label):
+    """Return True if the label has no X-group and therefore cannot be scored against other F-IDs."""
+    return label != '0' and len(label.split('.')[0]) == 0
+
+def scoreLabelPair(i,j):
+    """Return the score of two labels for the score table or None if scoring() would fail."""
+    if i != j and i != '0' and j != '0' and (isEmptyFID(i) or isEmptyFID(j)):
+        return None
+    return scoring(i,j)
+
+def internLabels(list_with_all_sequences):
     """
-    Build a matrix of the correct length for the scorematrix function.
+    Map every distinct F-ID of the input to an integer code and build the score table.
 
     arguments:
-    sequence_length1 -- length of the first sequence
-    sequence_length2 -- length of the second sequence
-    
-    Dimensions of the matrix are len(seq)+1 for each seq.
-    Initiate the matrix with 0. 
-    return value: matrix as 2d list
+    list_with_all_sequences -- list of Sequence as returned by convertInput()
+
+    The score table is computed once per run from the current WEIGHT_* values,
+    so setScore() has to be called before. Code 0 is reserved for the label '0'.
     """
-    # compute matrix size
-    row = sequence_length2+1
-    column = sequence_length1+1
+    global label_codes
+
+    # start with an empty table, so that it is built with the current weights
+    label_codes = None
+    for entry in list_with_all_sequences:
+        encodeLabels(entry.labels)
 
-    # initialize matrix with 0
-    try:
-        matrix = [[0 for column in range(column)] for row in range(row)]
-    except Exception as e:
-        print('An error occured in build_matrix():', e)
-        if args.log:
-            logging.critical('Error in build_matrix(): %s', e)
-        sys.exit(1)
     if args.log:
-        logging.debug('build_matrix executed with a matrix of size %s x %s.',sequence_length1,sequence_length2)
-    return matrix
+        logging.info('%s distinct labels interned, score table with %s entries built.',
+                     str(len(label_list)), str(len(label_list)**2))
+
+def encodeLabels(value_list):
+    """
+    Return the list of integer codes for the labels in value_list.
+
+    Labels that are not interned yet get a new code and the score table is extended
+    by one row and one column for each of them.
+    """
+    global label_codes
+    global label_list
+    global score_table
+    global has_empty_fid
+    global score_table_array
+
+    if label_codes is None:
+        label_codes = {'0': 0}
+        label_list = ['0']
+        score_table = [[scoring('0','0')]]
+        has_empty_fid = False
+        # the array of the numpy engine belongs to the previous table
+        score_table_array = None
+
+    codes = []
+    for label in value_list:
+        code = label_codes.get(label)
+        if code is None:
+            code = len(label_list)
+            label_codes[label] = code
+            label_list.append(label)
+            for other, row in zip(label_list, score_table):
+                row.append(scoreLabelPair(other,label))
+            score_table.append([scoreLabelPair(label,other) for other in label_list])
+            if isEmptyFID(label):
+                has_empty_fid = True
+        codes.append(code)
+    return codes
+
+class Workspace:
+    """
+    Buffers of the score matrix and the pointer matrix that are reused for all pairs.
+
+    The buffers grow to the largest pair seen. The scores are stored in an array('i') and the
+    pointers in a bytearray with one byte per cell, for the numpy engine in numpy arrays.
+    The matrices are returned as views of the buffers, so no lists of boxed integers are
+    built for a pair.
+    """
+
+    def __init__(self):
+        self.scores = array.array('i')
+        self.pointers = bytearray()
+        self.numpy_scores = None
+        self.numpy_pointers = None
+
+    def rows(self,sequence_length1,sequence_length2):
+        """
+        Return the score matrix and the pointer matrix of a pair as lists of row views.
+
+        The rows are memoryviews of the buffers and are indexed like the rows of nested
+        lists. The cells are not initialized.
+        """
+        column = sequence_length1+1
+        cells = column*(sequence_length2+1)
+        if len(self.pointers) < cells:
+            # a new buffer, the views of the previous pair may still be in use
+            try:
+                self.scores = array.array('i', bytes(4*cells))
+                self.pointers = bytearray(cells)
+            except MemoryError as e:
+                print('An error occured in Workspace.rows():', e)
+                if args.log:
+                    logging.critical('Error in Workspace.rows(): %s', e)
+                sys.exit(1)
+            if args.log:
+                logging.debug('The workspace grew to a matrix of size %s x %s.',
+                              sequence_length1,sequence_length2)
+        scores = memoryview(self.scores)
+        pointers = memoryview(self.pointers)
+        return ([scores[start:start+column] for start in range(0, cells, column)],
+                [pointers[start:start+column] for start in range(0, cells, column)])
+
+    def arrays(self,sequence_length1,sequence_length2):
+        """Return the score matrix (int32) and the pointer matrix (uint8) as numpy arrays."""
+        shape = (sequence_length2+1, sequence_length1+1)
+        cells = shape[0]*shape[1]
+        if self.numpy_scores is None or self.numpy_scores.size < cells:
+            try:
+                self.numpy_scores = np.empty(cells, dtype=np.int32)
+                self.numpy_pointers = np.empty(cells, dtype=np.uint8)
+            except MemoryError as e:
+                print('An error occured in Workspace.arrays():', e)
+                if args.log:
+                    logging.critical('Error in Workspace.arrays(): %s', e)
+                sys.exit(1)
+            if args.log:
+                logging.debug('The numpy workspace grew to a matrix of size %s x %s.',
+                              sequence_length1,sequence_length2)
+        return (self.numpy_scores[:cells].reshape(shape),
+                self.numpy_pointers[:cells].reshape(shape))
+
+def getWorkspace():
+    """Return the workspace of the process, create it for the first pair."""
+    global workspace
+
+    if workspace is None:
+        workspace = Workspace()
+    return workspace
+
+def rowScores(i,codes1,codes2,value_list1,value_list2):
+    """
+    Return the scores of label value_list2[i-1] against every label of value_list1.
+
+    If the row contains a pair with an empty F-ID, scoring() is called for it
+    to report the error like the cell-by-cell computation does.
+    """
+    table_row = score_table[codes2[i-1]]
+    row_scores = [table_row[code] for code in codes1]
+    if has_empty_fid and None in row_scores:
+        scoring(value_list2[i-1], value_list1[row_scores.index(None)])
+    return row_scores
 
 def scorematrix(sequence_length1,sequence_length2,value_list1,value_list2):
     """
@@ -372,42 +740,53 @@ def scorematrix(sequence_length1,sequence_length2,value_list1,value_list2):
     value_list2 -- second sequence as list
    
     Stores computed scores in the scorematrix with dimensions
-    m + 1, n + 1, if m and n are the lengths of the sequences.
+    m + 1, n + 1, if m and n are the lengths of the sequences, and the pointers
+    in ptr_matrix. Both are rows of the buffers of the workspace.
     
     return value: matrix
     """
 
-    matrix = build_matrix(sequence_length1,sequence_length2)
+    global ptr_matrix
+
+    matrix, ptr_matrix = getWorkspace().rows(sequence_length1,sequence_length2)
 
     #initialize matrix
     # set amount of rows
     MATRIX_COLUMN_N = sequence_length2+1 # length of the sequence in the column plus init row
     # set amount of columns
     MATRIX_ROW_N = sequence_length1+1 # length of the sequence in the row plus init column
-    # i and j have to be 1 at the beginning, because M[0][0]=0
-    for i in range(1,MATRIX_COLUMN_N):
-        matrix[i][0] = PENALTY_GAP_OPENING * i
-    for j in range(1,MATRIX_ROW_N):
-        matrix[0][j] = PENALTY_GAP_OPENING * j
+    # every row is computed in a list and copied into the matrix, previous is the row above
+    previous = [PENALTY_GAP_OPENING * j for j in range(MATRIX_ROW_N)]
+    matrix[0][:] = array.array('i', previous)
+
+    # map the labels to their codes, the inner loops only look up the score table
+    codes1 = encodeLabels(value_list1)
+    codes2 = encodeLabels(value_list2)
 
     # fill the score matrix
     if not args.gapextension:
         for i in range(1,MATRIX_COLUMN_N):
+            row_scores = rowScores(i,codes1,codes2,value_list1,value_list2)
+            current = [PENALTY_GAP_OPENING * i]
+            ptr_row = bytearray(MATRIX_ROW_N)
             for j in range(1,MATRIX_ROW_N):
                 # [i-1] and [j-1] because of the start of i,j at 1 but start of the list at 0.
                 # Match calculation: F(i-1,j-1) + s(a_i,b_j)
-                match = matrix[i-1][j-1] + scoring(value_list2[i-1], value_list1[j-1])
-                insert = matrix[i][j-1] + PENALTY_GAP_OPENING
-                delete = matrix[i-1][j] + PENALTY_GAP_OPENING
+                match = previous[j-1] + row_scores[j-1]
+                insert = current[j-1] + PENALTY_GAP_OPENING
+                delete = previous[j] + PENALTY_GAP_OPENING
                 if match >= insert and match >= delete:
-                    matrix[i][j] = match
-                    ptr_matrix[i][j] = 1 # stores "diag"
+                    current.append(match)
+                    ptr_row[j] = 1 # stores "diag"
                 elif insert >= delete:
-                    matrix[i][j] = insert
-                    ptr_matrix[i][j] = 2 # stores "left"
+                    current.append(insert)
+                    ptr_row[j] = 2 # stores "left"
                 else:
-                    matrix[i][j] = delete
-                    ptr_matrix[i][j] = 3 # stores "up"
+                    current.append(delete)
+                    ptr_row[j] = 3 # stores "up"
+            matrix[i][:] = array.array('i', current)
+            ptr_matrix[i][:] = ptr_row
+            previous = current
 
     # fill score matrix (gapextension version)
     if args.gapextension:
@@ -416,216 +795,2619 @@ def scorematrix(sequence_length1,sequence_length2,value_list1,value_list2):
         previous_is_deletion =  [False for i in range(MATRIX_ROW_N)]
 
         for i in range(1,MATRIX_COLUMN_N):
+            row_scores = rowScores(i,codes1,codes2,value_list1,value_list2)
+            current = [PENALTY_GAP_OPENING * i]
+            ptr_row = bytearray(MATRIX_ROW_N)
             for j in range(1,MATRIX_ROW_N):
-                match = matrix[i-1][j-1] + scoring(value_list2[i-1], value_list1[j-1])
-                insert = matrix[i][j-1] + PENALTY_GAP_OPENING
-                delete = matrix[i-1][j] + PENALTY_GAP_OPENING
+                match = previous[j-1] + row_scores[j-1]
+                insert = current[j-1] + PENALTY_GAP_OPENING
+                delete = previous[j] + PENALTY_GAP_OPENING
                 if match >= insert and match >= delete:
-                    matrix[i][j] = match
-                    ptr_matrix[i][j] = 1 # stores "diag" pointer
+                    current.append(match)
+                    ptr_row[j] = 1 # stores "diag" pointer
                     # store the value for gap o/e
                     previous_is_deletion[j] = False
                     previous_is_insertion = False
                 elif insert >= delete:
                     # check if insertion is extending a gap or not
                     if previous_is_insertion is False:
-                        insert = matrix[i][j-1] + PENALTY_GAP_OPENING
+                        insert = current[j-1] + PENALTY_GAP_OPENING
                     else:
-                        insert = matrix[i][j-1] + PENALTY_GAP_EXTENSION
-                    matrix[i][j] = insert
-                    ptr_matrix[i][j] = 2 # stores "left" pointer
+                        insert = current[j-1] + PENALTY_GAP_EXTENSION
+                    current.append(insert)
+                    ptr_row[j] = 2 # stores "left" pointer
                     # store the value for gap o/e
                     previous_is_insertion = True
                     previous_is_deletion[j] = False
                 else:
                     # check if deletion is extending a gap or not
                     if previous_is_deletion[j] is False:
-                        delete = matrix[i-1][j] + PENALTY_GAP_OPENING
+                        delete = previous[j] + PENALTY_GAP_OPENING
                     else:
-                        delete = matrix[i-1][j] + PENALTY_GAP_EXTENSION
-                    matrix[i][j] = delete
-                    ptr_matrix[i][j] = 3 # stores "up" pointer
+                        delete = previous[j] + PENALTY_GAP_EXTENSION
+                    current.append(delete)
+                    ptr_row[j] = 3 # stores "up" pointer
                     # store the value for gap o/e
                     previous_is_deletion[j] = True
                     previous_is_insertion = False
+            matrix[i][:] = array.array('i', current)
+            ptr_matrix[i][:] = ptr_row
+            previous = current
 
     if args.log:
         logging.debug('Function scorematrix() is executed, with args.gapextension = %s.',args.gapextension)
 
     return matrix
 
-def traceback(name1,name2,value_list1,value_list2, matrix):
-    """Go back through the matrix with information about the matches and align the sequences.
+def checkLabelPairs(value_list1,value_list2,codes1,codes2):
+    """Call scoring() for the first label pair of two sequences that cannot be scored."""
+    for code2 in dict.fromkeys(codes2):
+        table_row = score_table[code2]
+        for code1 in dict.fromkeys(codes1):
+            if table_row[code1] is None:
+                scoring(label_list[code2], label_list[code1])
 
-    arguments:
-    name1 -- Name of sequence 1
-    name2 -- Name of sequence 2
-    value_list1 -- String of sequence 1
-    value_list2 -- String of sequence 2
-    matrix -- matrix filled with scores by scorematrix()
-    
-    write the alignment and additional information in a file
+def scoreTableArray():
+    """Return the score table as numpy array, rebuild it if new labels were interned."""
+    global score_table_array
+
+    if score_table_array is None or len(score_table_array) != len(score_table):
+        score_table_array = np.array([[0 if score is None else score for score in row]
+                                      for row in score_table], dtype=np.int64)
+    return score_table_array
+
+def firstIndexAbove(values,limit,start):
     """
+    Return the first index >= start with values[index] > limit, or len(values) if there is none.
 
-    # initialize variables
-    AlignmentA = ''
-    AlignmentB = ''
-    GAP_CHARACTER = '-'
-    list_length1 = len(value_list1)
-    list_length2 = len(value_list2)
-    i = list_length2
-    j = list_length1
-    list_index_1 = i-1
-    list_index_2 = j-1
-    global number_of_lines_in_outfile
-    global number_of_zero_matches
-    # compute alignment as in Needleman-Wunsch algorithm
-    while i>0 or j>0:
-        if i>0 and j > 0 and ptr_matrix[i][j] == 1: # match, go diag
-            AlignmentA = str(value_list2[list_index_1]) + ',' + AlignmentA
-            AlignmentB = str(value_list1[list_index_2]) + ',' + AlignmentB
-            if value_list2[list_index_1] == '0' and value_list1[list_index_2] == '0':
-                number_of_zero_matches += 1
-            list_index_1 = list_index_1-1
-            i = i - 1
-            list_index_2 = list_index_2-1
-            j = j - 1
-        elif i>0 and (ptr_matrix[i][j] == 3 or j==0): # deletion or edge of the matrix
-            AlignmentA = str(value_list2[list_index_1]) + ',' + AlignmentA
-            AlignmentB = GAP_CHARACTER + ',' + AlignmentB
-            list_index_1 = list_index_1-1
-            i = i - 1
-        elif j>0 and (ptr_matrix[i][j] == 2 or i==0): # insertion or edge of the matrix
-            AlignmentA = GAP_CHARACTER + ',' + AlignmentA
-            AlignmentB = str(value_list1[list_index_2]) + ',' + AlignmentB
-            j = j - 1
-            list_index_2 = list_index_2-1
-        else:
-            print('error in traceback')
-            if args.log:
-                logging.critical('error in traceback')
-            sys.exit(1)
+    The array is searched in windows of growing size, so that short runs only look at
+    a small part of the row.
+    """
+    window = 32
+    while start < len(values):
+        hits = np.flatnonzero(values[start:start+window] > limit)
+        if len(hits) > 0:
+            return start + int(hits[0])
+        start = start + window
+        window = window * 2
+    return len(values)
 
-    # prepare Strings for writing
-    AlignmentA = AlignmentA.strip(',')
-    AlignmentB = AlignmentB.strip(',')
-    score_alignment = str(matrix[list_length2][list_length1])
+def scorematrix_numpy(sequence_length1,sequence_length2,value_list1,value_list2):
+    """
+    Build and return a scorematrix with numpy and store the pointers in ptr_matrix.
 
-    # build lists for verbose output and length computation
-    list_of_AlignmentA = AlignmentA.split(',')
-    list_of_AlignmentB = AlignmentB.split(',')
-    alignmentlength = len(list_of_AlignmentA)
+    arguments:
+    sequence_length1 -- length of the first sequence
+    sequence_length2 -- length of the second sequence
+    value_list1 -- first sequence as list
+    value_list2 -- second sequence as list
 
-    # normalize the alignment score over length of alignment
-    # (divide score_alignment by length of alignment minus number of "0 matches")
-    try:
-        score_alignment_normalized = int(score_alignment) / (int(alignmentlength-number_of_zero_matches))
-    except ZeroDivisionError as e:
-        print('An error occurred in traceback(): Sequence without protein domain '
-              'found. Please run the program again with reasonable input.')
-        if args.log:
-            logging.critical('An error occured in traceback(): Sequence without '
-                             'protein domain found. Please run the program again with reasonable '
-                             'input. Error: %s.',e)
-        sys.exit(1)
-        
+    Computes the same scores and pointers as scorematrix(), but row by row with vectorized
+    recurrences. Scores are stored as int32, the pointers as uint8.
 
-    # build a string with names, score and length of alignment, set filename
-    first_line = name1 + ',' + name2 + ',' + score_alignment + ',' + str(alignmentlength) + ',' + str(score_alignment_normalized)
-    filename = timestamp+'_'+'alignments_'+os.path.basename(args.filename)
+    return value: matrix
+    """
+    global ptr_matrix
 
-    # write 3 lines in an outputfile (for every alignment)
-    with open(filename, 'a', encoding="utf-8") as file_alignments:
-        file_alignments.write(first_line + '\n' + AlignmentB + '\n' + AlignmentA + '\n')
+    codes1 = encodeLabels(value_list1)
+    codes2 = encodeLabels(value_list2)
+    if has_empty_fid:
+        checkLabelPairs(value_list1,value_list2,codes1,codes2)
+    table = scoreTableArray()
+    codes1 = np.array(codes1, dtype=np.intp)
 
-    # write log info
-    number_of_lines_in_outfile = number_of_lines_in_outfile+3
+    matrix, ptr_matrix = getWorkspace().arrays(sequence_length1,sequence_length2)
+    # the pointers of the first row are read with --gapextension
+    ptr_matrix[0] = 0
 
-    # check if option -verbose is set and if so, create the second output file
-    if args.verbose:
-        writeHumanreadableOutput(name1,name2,score_alignment,alignmentlength, 
-                                list_of_AlignmentA,list_of_AlignmentB)
-    number_of_zero_matches = 0
+    # initialize matrix
+    columns = np.arange(sequence_length1+1, dtype=np.int64)
+    matrix[0] = PENALTY_GAP_OPENING * columns
+    matrix[:,0] = PENALTY_GAP_OPENING * np.arange(sequence_length2+1)
+    previous = matrix[0].astype(np.int64)
+    current = np.empty(sequence_length1+1, dtype=np.int64)
 
-def needleman_wunsch(subset):
-    """Function with all calls for NWA, except selfalignments."""
+    # fill the score matrix
+    if not args.gapextension:
+        # M(i,j) = max(best(j), M(i,j-1) + gap) is a running maximum over best(k) + gap*(j-k)
+        gap_offsets = PENALTY_GAP_OPENING * columns
+        for i in range(1,sequence_length2+1):
+            match = previous[:-1] + table[codes2[i-1]][codes1]
+            delete = previous[1:] + PENALTY_GAP_OPENING
+            current[0] = PENALTY_GAP_OPENING * i
+            np.maximum(match, delete, out=current[1:])
+            current -= gap_offsets
+            np.maximum.accumulate(current, out=current)
+            current += gap_offsets
+            insert = current[:-1] + PENALTY_GAP_OPENING
+            ptr_matrix[i,1:] = np.where((match >= insert) & (match >= delete), 1,
+                                        np.where(insert >= delete, 2, 3))
+            matrix[i] = current
+            previous, current = current, previous
 
-    # global variables
-    global number_of_alignments
-    global ptr_matrix
+    # fill score matrix (gapextension version)
+    if args.gapextension:
+        # the insertion state is carried over from the end of the previous row like in scorematrix()
+        previous_is_insertion = False
 
-    #input variables
-    name1 = subset[0][0]
-    name2 = subset[1][0]
-    value_string1 = subset[0][1]
-    value_string2 = subset[1][1]
-    value_list1 = value_string1.split(',')
-    value_list2 = value_string2.split(',')
+        for i in range(1,sequence_length2+1):
+            match = previous[:-1] + table[codes2[i-1]][codes1]
+            delete = previous[1:] + PENALTY_GAP_OPENING
+            is_diag = match >= delete
+            previous_is_deletion = ptr_matrix[i-1,1:] == 3
+            # value of the cell if the left pointer is not chosen
+            current[0] = PENALTY_GAP_OPENING * i
+            current[1:] = np.where(is_diag, match, np.where(previous_is_deletion,
+                                   previous[1:] + PENALTY_GAP_EXTENSION, delete))
+            ptr_row = np.where(is_diag, 1, 3).astype(np.uint8)
+            # the left pointer is chosen if M(i,j-1) >= limit(j)
+            limit = np.where(is_diag, match + 1, delete) - PENALTY_GAP_OPENING
+            # cells where an insertion can start after a cell without insertion
+            starts = np.flatnonzero(current[1:-1] >= limit[1:]) + 1
+            # a run of insertions has the values base + ext*(k+1) and continues while base >= run_limit
+            run_limit = limit - PENALTY_GAP_EXTENSION * columns[:-1]
 
-    sequence_length1 = len(value_list1)
-    sequence_length2 = len(value_list2)
+            # walk over the runs of insertions in this row, k is the 0-based column
+            k = 0
+            value = current[0]
+            while k < sequence_length1:
+                if value >= limit[k]:
+                    if previous_is_insertion:
+                        value = value + PENALTY_GAP_EXTENSION
+                    else:
+                        value = value + PENALTY_GAP_OPENING
+                    run_base = value - PENALTY_GAP_EXTENSION * (k+1)
+                    end = firstIndexAbove(run_limit, run_base, k+1)
+                    current[k+1:end+1] = run_base + PENALTY_GAP_EXTENSION * columns[k+1:end+1]
+                    ptr_row[k:end] = 2
+                    previous_is_insertion = True
+                    if end >= sequence_length1:
+                        break
+                    k = end
+                previous_is_insertion = False
+                next_start = np.searchsorted(starts, k+1)
+                if next_start >= len(starts):
+                    break
+                k = int(starts[next_start])
+                value = current[k]
+            ptr_matrix[i,1:] = ptr_row
+            matrix[i] = current
+            previous, current = current, previous
 
-    # build scorematrix for this alignment
-    ptr_matrix = build_matrix(sequence_length1,sequence_length2)
-    matrix = scorematrix(sequence_length1,sequence_length2,value_list1,value_list2)
+    if args.log:
+        logging.debug('Function scorematrix_numpy() is executed, with args.gapextension = %s.',args.gapextension)
 
-    # compute traceback for this alignment
-    traceback(name1,name2,value_list1,value_list2, matrix)
+    return matrix
 
-    # global count for logging
-    number_of_alignments = number_of_alignments+1
+def runLengthRuns(codes):
+    """Return the boundaries and the label codes of the runs of equal labels in codes."""
+    bounds = [0]
+    run_codes = []
+    for code, run in itertools.groupby(codes):
+        run_codes.append(code)
+        bounds.append(bounds[-1] + len(list(run)))
+    return bounds, run_codes
 
-def needleman_wunschSelf(entry):
-    """Function with all selfalingment calls for NWA."""
+def rangeMaxTable(values):
+    """Build a sparse table for maximum queries over ranges of values."""
+    table = [values]
+    width = 1
+    while 2*width <= len(values):
+        previous = table[-1]
+        table.append([max(x, y) for x, y in zip(previous, previous[width:])])
+        width = width*2
+    return table
 
-    # global variables
-    global number_of_alignments
-    global ptr_matrix
+def rangeMax(table,low,high):
+    """Return the maximum of the values from index low to index high (inclusive)."""
+    level = (high-low+1).bit_length()-1
+    return max(table[level][low], table[level][high-(1 << level)+1])
 
-    #input variables
-    name1 = entry[0]
-    name2 = name1
-    value_string = entry[1]
-    value_list1 = value_string.split(',')
-    value_list2 = value_list1
+def runLengthBlock(top,left,score):
+    """
+    Return a function that computes the scores inside a block with one label pair.
 
-    sequence_length1 = len(value_list1)
-    sequence_length2 = sequence_length1
+    arguments:
+    top -- scores of the row above the block, starting with the column left of the block
+    left -- scores of the column left of the block, starting with the row above the block
+    score -- score of the label pair of the block
 
-    # build scorematrix for this alignment
-    ptr_matrix = build_matrix(sequence_length1,sequence_length2)
-    matrix = scorematrix(sequence_length1,sequence_length2,value_list1,value_list2)
+    Every path to a cell in the block enters it from the top row or the left column and
+    uses only diagonal steps with the same score and gaps inside the block. With linear gap
+    penalties the score of a cell (a,b) is therefore the maximum over these entry cells.
+    """
+    gap = PENALTY_GAP_OPENING
 
-    # compute traceback for this alignment
-    traceback(name1,name2,value_list1,value_list2, matrix)
+    # diagonal steps are better than two gaps: use as many diagonal steps as possible
+    if score > 2*gap:
+        diag = score-gap
+        top_near = rangeMaxTable([value - diag*b for b, value in enumerate(top)])
+        top_far = list(itertools.accumulate([value - gap*b for b, value in enumerate(top)], max))
+        left_near = list(itertools.accumulate([value - gap*a for a, value in enumerate(left)], max))
+        left_far = rangeMaxTable([value - diag*a for a, value in enumerate(left)])
 
-    # global count for logging
-    number_of_alignments = number_of_alignments+1
+        def blockScore(a,b):
+            best = max(rangeMax(top_near, max(0,b-a), b) + diag*b + gap*a,
+                       rangeMax(left_far, max(0,a-b+1), a) + diag*a + gap*b)
+            if b > a:
+                return max(best, top_far[b-a-1] + gap*b + diag*a)
+            return max(best, left_near[a-b] + diag*b + gap*a)
 
-def alignAllPairs(list_with_all_sequences):
-    """Calls NWA for every possible pair of sequences."""
+    # otherwise a path inside the block only consists of gaps
+    else:
+        top_gaps = list(itertools.accumulate([value - gap*b for b, value in enumerate(top)], max))
+        left_gaps = list(itertools.accumulate([value - gap*a for a, value in enumerate(left)], max))
 
-    for subset in itertools.combinations(list_with_all_sequences, 2):
-        needleman_wunsch(subset)
+        def blockScore(a,b):
+            return max(top_gaps[b], left_gaps[a]) + gap*(a+b)
 
-    # if it is not explicitly stated that selfalignments should not be calculated,
-    # calculate selfalignments.
-    if not args.noselfalignment:
-        if args.log:
-            logging.info('Compute self-alignments. '
-                         'For an output file without self-alignments, check program options.'
-                         )
-        for entry in list_with_all_sequences:
-            needleman_wunschSelf(entry) # appended to the entries of needleman_wunsch()
+    return blockScore
 
-def writeHumanreadableOutput(name1,name2,score_alignment,alignmentlength,
-list_of_AlignmentA,list_of_AlignmentB):
-    """Writes a more human readable output if -v is active and inserts padding into the alignment."""
+def windowMaxima(values,width):
+    """Return the maxima of values over the windows of the given width ending at every index."""
+    if width >= len(values):
+        return list(itertools.accumulate(values, max))
+    prefix = []
+    suffix = []
+    for start in range(0,len(values),width):
+        chunk = values[start:start+width]
+        prefix.extend(itertools.accumulate(chunk, max))
+        suffix.extend(reversed(list(itertools.accumulate(reversed(chunk), max))))
+    return prefix[:width-1] + [max(suffix[x-width+1], prefix[x]) for x in range(width-1,len(values))]
 
-    # variables
-    entry_splitted=[]
-    transformedListA=[0]*alignmentlength
-    transformedListB=[0]*alignmentlength
+def runLengthBlockEdges(top,left,score):
+    """
+    Return the scores of the bottom row and the right column of a block with one label pair.
+
+    Uses the same entry cells as runLengthBlock(), but with running maxima over the
+    entry cells, so the cost is linear in the side lengths of the block.
+    """
+    gap = PENALTY_GAP_OPENING
+    height = len(left)-1
+    width = len(top)-1
+
+    if score > 2*gap:
+        diag = score-gap
+        top_diag = [value - diag*b for b, value in enumerate(top)]
+        top_gaps = list(itertools.accumulate([value - gap*b for b, value in enumerate(top)], max))
+        left_gaps = list(itertools.accumulate([value - gap*a for a, value in enumerate(left)], max))
+        left_diag = [value - diag*a for a, value in enumerate(left)]
+        top_window = windowMaxima(top_diag, height+1)
+        top_suffix = list(itertools.accumulate(reversed(top_diag), max))[::-1]
+        left_window = windowMaxima(left_diag, width)
+        left_suffix = list(itertools.accumulate(reversed(left_diag), max))[::-1]
+
+        bottom_row = [max(top_window[b] + diag*b + gap*height,
+                          left_suffix[max(0,height-b+1)] + diag*height + gap*b,
+                          top_gaps[b-height-1] + gap*b + diag*height if b > height
+                          else left_gaps[height-b] + diag*b + gap*height)
+                      for b in range(1,width+1)]
+        right_column = [max(top_suffix[max(0,width-a)] + diag*width + gap*a,
+                            left_window[a] + diag*a + gap*width,
+                            top_gaps[width-a-1] + gap*width + diag*a if width > a
+                            else left_gaps[a-width] + diag*width + gap*a)
+                        for a in range(1,height+1)]
+    else:
+        top_gaps = list(itertools.accumulate([value - gap*b for b, value in enumerate(top)], max))
+        left_gaps = list(itertools.accumulate([value - gap*a for a, value in enumerate(left)], max))
+        bottom_row = [max(top_gaps[b], left_gaps[height]) + gap*(height+b)
+                      for b in range(1,width+1)]
+        right_column = [max(top_gaps[width], left_gaps[a]) + gap*(a+width)
+                        for a in range(1,height+1)]
+
+    return bottom_row, right_column
+
+def scorematrix_runlength(sequence_length1,sequence_length2,value_list1,value_list2):
+    """
+    Compute the alignment on the runs of equal labels and store its path in ptr_matrix.
+
+    arguments:
+    sequence_length1 -- length of the first sequence
+    sequence_length2 -- length of the second sequence
+    value_list1 -- first sequence as list
+    value_list2 -- second sequence as list
+
+    The matrix is split into blocks with one label per row run and column run. Only the
+    rows and columns at the run boundaries are computed, each block in time linear in its
+    side lengths. Every boundary row and column spans the whole matrix, so with R row runs
+    and C column runs the time and memory are O(R*sequence_length1 + C*sequence_length2)
+    instead of O(sequence_length1*sequence_length2). The traceback path is computed from
+    the scores of the cells on the path, so that the pointers are the same as in
+    scorematrix(). Only for linear gap penalties.
+
+    return value: dictionary with the matrix rows at the row run boundaries
+    """
+    global ptr_matrix
+
+    codes1 = encodeLabels(value_list1)
+    codes2 = encodeLabels(value_list2)
+    if has_empty_fid:
+        checkLabelPairs(value_list1,value_list2,codes1,codes2)
+    column_bounds, column_codes = runLengthRuns(codes1)
+    row_bounds, row_codes = runLengthRuns(codes2)
+    gap = PENALTY_GAP_OPENING
+
+    # initialize the rows and columns at the run boundaries
+    rows = {}
+    for i in row_bounds:
+        rows[i] = [gap*i] + [gap*j if i == 0 else 0 for j in range(1,sequence_length1+1)]
+    columns = {}
+    for j in column_bounds:
+        columns[j] = [gap*j] + [gap*i if j == 0 else 0 for i in range(1,sequence_length2+1)]
+
+    # compute the bottom row and the right column of every block
+    for k, row_code in enumerate(row_codes):
+        top, bottom = row_bounds[k], row_bounds[k+1]
+        for l, column_code in enumerate(column_codes):
+            left, right = column_bounds[l], column_bounds[l+1]
+            bottom_row, right_column = runLengthBlockEdges(rows[top][left:right+1],
+                                                           columns[left][top:bottom+1],
+                                                           score_table[row_code][column_code])
+            rows[bottom][left+1:right+1] = bottom_row
+            columns[right][top+1:bottom+1] = right_column
+
+    blocks = {}
+    def cellScore(i,j):
+        if i in rows:
+            return rows[i][j]
+        if j in columns:
+            return columns[j][i]
+        k = bisect.bisect_right(row_bounds,i)-1
+        l = bisect.bisect_right(column_bounds,j)-1
+        if (k,l) not in blocks:
+            top, bottom = row_bounds[k], row_bounds[k+1]
+            left, right = column_bounds[l], column_bounds[l+1]
+            blocks[(k,l)] = runLengthBlock(rows[top][left:right+1], columns[left][top:bottom+1],
+                                           score_table[row_codes[k]][column_codes[l]])
+        return blocks[(k,l)](i-row_bounds[k],j-column_bounds[l])
+
+    # store the pointers of the cells on the traceback path, as scorematrix() would
+    ptr_matrix = [{} for i in range(sequence_length2+1)]
+    i = sequence_length2
+    j = sequence_length1
+    while i>0 or j>0:
+        pointer = 0
+        if i>0 and j>0:
+            match = cellScore(i-1,j-1) + score_table[codes2[i-1]][codes1[j-1]]
+            insert = cellScore(i,j-1) + gap
+            delete = cellScore(i-1,j) + gap
+            if match >= insert and match >= delete:
+                pointer = 1
+            elif insert >= delete:
+                pointer = 2
+            else:
+                pointer = 3
+        ptr_matrix[i][j] = pointer
+        if pointer == 1:
+            i = i - 1
+            j = j - 1
+        elif pointer == 3 or j == 0:
+            i = i - 1
+        else:
+            j = j - 1
+
+    if args.log:
+        logging.debug('Function scorematrix_runlength() is executed with %s x %s blocks.',
+                      len(column_codes),len(row_codes))
+
+    return rows
+
+def linearMemoryRow(previous,previous_ptr,left_value,is_insertion,table_row,codes):
+    """
+    Compute the scores and pointers of one row of a region like scorematrix().
+
+    arguments:
+    previous -- scores of the row above, from the left column of the region on
+    previous_ptr -- pointers of the row above as bytearray
+    left_value -- score of the cell of this row in the left column of the region
+    is_insertion -- True if a gap extension continues into the first cell (gapextension only)
+    table_row -- row of the score table for the label of this row
+    codes -- label codes of the columns of the region
+
+    return value: scores and pointers of the row, from the left column of the region on
+    """
+    current = [left_value]
+    ptr_row = bytearray(len(previous))
+    k = 1
+    if not args.gapextension:
+        for code in codes:
+            match = previous[k-1] + table_row[code]
+            insert = current[k-1] + PENALTY_GAP_OPENING
+            delete = previous[k] + PENALTY_GAP_OPENING
+            if match >= insert and match >= delete:
+                current.append(match)
+                ptr_row[k] = 1
+            elif insert >= delete:
+                current.append(insert)
+                ptr_row[k] = 2
+            else:
+                current.append(delete)
+                ptr_row[k] = 3
+            k = k + 1
+    else:
+        for code in codes:
+            match = previous[k-1] + table_row[code]
+            insert = current[k-1] + PENALTY_GAP_OPENING
+            delete = previous[k] + PENALTY_GAP_OPENING
+            if match >= insert and match >= delete:
+                current.append(match)
+                ptr_row[k] = 1
+                is_insertion = False
+            elif insert >= delete:
+                if is_insertion:
+                    insert = current[k-1] + PENALTY_GAP_EXTENSION
+                current.append(insert)
+                ptr_row[k] = 2
+                is_insertion = True
+            else:
+                if previous_ptr[k] == 3:
+                    delete = previous[k] + PENALTY_GAP_EXTENSION
+                current.append(delete)
+                ptr_row[k] = 3
+                is_insertion = False
+            k = k + 1
+    return current, ptr_row
+
+def linearMemoryPath(region,codes1,codes2):
+    """
+    Return the traceback path through a region of the score matrix, computed in linear space.
+
+    arguments:
+    region -- tuple (r0, r1, c0, c1, top, top_ptr, left, left_flags) with the rows r0..r1 and
+              columns c0..c1 of the region, the scores and pointers of row r0 and the scores of
+              column c0 with the gap extension state at the start of every row
+    codes1 -- label codes of the first sequence (columns)
+    codes2 -- label codes of the second sequence (rows)
+
+    The path starts at cell (r1,c1) and ends when it reaches row r0. Below row r0 it does not
+    reach column c0, except for c0 = 0 where it follows the edge of the matrix. The region is
+    split at its middle row; the column where the path enters the middle row is found by
+    carrying the column of origin along the pointers of the lower half. Both halves are
+    solved the same way until they are small enough to keep their pointers.
+
+    return value: tuple (moves from the end of the path, column in row r0, score of (r1,c1))
+    """
+    r0, r1, c0, c1, top, top_ptr, left, left_flags = region
+    codes = codes1[c0:c1]
+
+    # small region: keep the pointers and trace the path back
+    if r1-r0 <= 1 or (r1-r0+1)*(c1-c0+1) <= LINEAR_MEMORY_BLOCK_CELLS:
+        pointers = [top_ptr]
+        previous, previous_ptr = top, top_ptr
+        for i in range(r0+1,r1+1):
+            previous, previous_ptr = linearMemoryRow(previous,previous_ptr,left[i-r0],
+                                                     left_flags[i-r0],score_table[codes2[i-1]],codes)
+            pointers.append(previous_ptr)
+        moves = []
+        i = r1
+        j = c1
+        while i > r0:
+            pointer = 3 if j == c0 else pointers[i-r0][j-c0]
+            moves.append(pointer)
+            if pointer != 2:
+                i = i - 1
+            if pointer != 3:
+                j = j - 1
+        return moves, j, previous[-1]
+
+    # compute the scores down to the middle row
+    middle = (r0+r1)//2
+    previous, previous_ptr = top, top_ptr
+    for i in range(r0+1,middle+1):
+        previous, previous_ptr = linearMemoryRow(previous,previous_ptr,left[i-r0],
+                                                 left_flags[i-r0],score_table[codes2[i-1]],codes)
+    middle_row, middle_ptr = previous, previous_ptr
+
+    # carry the column where the path from every cell enters the middle row
+    origin = list(range(c0,c1+1))
+    for i in range(middle+1,r1+1):
+        previous, previous_ptr = linearMemoryRow(previous,previous_ptr,left[i-r0],
+                                                 left_flags[i-r0],score_table[codes2[i-1]],codes)
+        current = [origin[0]]
+        for k in range(1,len(origin)):
+            pointer = previous_ptr[k]
+            if pointer == 1:
+                current.append(origin[k-1])
+            elif pointer == 2:
+                current.append(current[k-1])
+            else:
+                current.append(origin[k])
+        origin = current
+    column = origin[-1]
+
+    # the lower half starts one column left of the column of the path in the middle row
+    start = max(column-1, c0)
+    lower_left = left[middle-r0:]
+    lower_flags = left_flags[middle-r0:]
+    if start > c0:
+        lower_left = [middle_row[start-c0]]
+        lower_flags = [middle_ptr[start-c0] == 2]
+        previous, previous_ptr = middle_row[:start-c0+1], middle_ptr[:start-c0+1]
+        for i in range(middle+1,r1+1):
+            previous, previous_ptr = linearMemoryRow(previous,previous_ptr,left[i-r0],
+                                                     left_flags[i-r0],score_table[codes2[i-1]],
+                                                     codes[:start-c0])
+            lower_left.append(previous[-1])
+            lower_flags.append(previous_ptr[-1] == 2)
+    lower = (middle, r1, start, c1, middle_row[start-c0:], middle_ptr[start-c0:],
+             lower_left, lower_flags)
+    upper = (r0, middle, c0, column, top[:column-c0+1], top_ptr[:column-c0+1],
+             left[:middle-r0+1], left_flags[:middle-r0+1])
+    del middle_row, middle_ptr, previous, previous_ptr, origin
+
+    lower_moves, lower_column, score = linearMemoryPath(lower,codes1,codes2)
+    # the score of the path is the score of the lower half, which ends at (r1,c1)
+    upper_moves, upper_column = linearMemoryPath(upper,codes1,codes2)[:2]
+    return lower_moves + upper_moves, upper_column, score
+
+def linearMemoryStartFlags(codes1,codes2):
+    """
+    Return the gap extension state at the start of every row of the matrix.
+
+    scorematrix() carries the insertion state from the last cell of a row into the next row,
+    so a region at the left edge needs it from a pass over the whole width.
+    """
+    flags = [False, False]
+    previous = [PENALTY_GAP_OPENING * j for j in range(len(codes1)+1)]
+    previous_ptr = bytearray(len(codes1)+1)
+    for i in range(1,len(codes2)):
+        previous, previous_ptr = linearMemoryRow(previous,previous_ptr,PENALTY_GAP_OPENING * i,
+                                                 flags[i],score_table[codes2[i-1]],codes1)
+        flags.append(previous_ptr[-1] == 2)
+    return flags
+
+def linearMemoryAlignment(name1,name2,value_list1,value_list2):
+    """
+    Align two sequences in linear space and return the alignment record like traceback().
+
+    arguments:
+    name1 -- Name of sequence 1
+    name2 -- Name of sequence 2
+    value_list1 -- first sequence as list
+    value_list2 -- second sequence as list
+
+    Only O(m+n) scores are kept at a time, the path and the score are the same as with
+    scorematrix() and traceback().
+    """
+    codes1 = encodeLabels(value_list1)
+    codes2 = encodeLabels(value_list2)
+    if has_empty_fid:
+        checkLabelPairs(value_list1,value_list2,codes1,codes2)
+    list_length1 = len(value_list1)
+    list_length2 = len(value_list2)
+
+    if args.gapextension:
+        flags = linearMemoryStartFlags(codes1,codes2)
+    else:
+        flags = [False] * (list_length2+1)
+    region = (0, list_length2, 0, list_length1,
+              [PENALTY_GAP_OPENING * j for j in range(list_length1+1)], bytearray(list_length1+1),
+              [PENALTY_GAP_OPENING * i for i in range(list_length2+1)], flags)
+    moves, column, score = linearMemoryPath(region,codes1,codes2)
+    # the rest of the path follows the first row of the matrix
+    moves.extend([2] * column)
+
+    if args.log:
+        logging.debug('Function linearMemoryAlignment() is executed with a matrix of size %s x %s.',
+                      list_length1,list_length2)
+
+    return pathRecord(name1,name2,value_list1,value_list2,moves,score)
+
+def pathRecord(name1,name2,value_list1,value_list2,moves,score):
+    """
+    Build the alignment record of a path like traceback().
+
+    arguments:
+    moves -- pointers of the path from the end of the sequences (1 diag, 2 left, 3 up)
+    score -- score of the alignment
+    """
+    list_length1 = len(value_list1)
+    list_length2 = len(value_list2)
+
+    # build the alignment from the end of the sequences
+    GAP_CHARACTER = '-'
+    partsA = []
+    partsB = []
+    number_of_zero_matches = 0
+    i = list_length2
+    j = list_length1
+    for move in moves:
+        if move == 1:
+            partsA.append(value_list2[i-1])
+            partsB.append(value_list1[j-1])
+            if value_list2[i-1] == '0' and value_list1[j-1] == '0':
+                number_of_zero_matches += 1
+            i = i - 1
+            j = j - 1
+        elif move == 3:
+            partsA.append(value_list2[i-1])
+            partsB.append(GAP_CHARACTER)
+            i = i - 1
+        else:
+            partsA.append(GAP_CHARACTER)
+            partsB.append(value_list1[j-1])
+            j = j - 1
+    AlignmentA = ','.join(reversed(partsA)).strip(',')
+    AlignmentB = ','.join(reversed(partsB)).strip(',')
+
+    return alignmentRecord(name1,name2,str(score),len(partsA),AlignmentA,AlignmentB,
+                           number_of_zero_matches)
+
+def bandStart(codes1,codes2):
+    """
+    Return the diagonals (j - i) of the first band as tuple (low, high).
+
+    The band contains the main diagonal, the diagonal of the end of both sequences and the
+    diagonal of the first domain label that both sequences have, widened by BAND_MIN_WIDTH
+    or a fraction of the longer sequence.
+    """
+    list_length1 = len(codes1)
+    list_length2 = len(codes2)
+    diagonals = [0, list_length1-list_length2]
+
+    first_position2 = {}
+    for position, code in enumerate(codes2):
+        if code != 0:
+            first_position2.setdefault(code, position)
+    for position, code in enumerate(codes1):
+        if code in first_position2:
+            diagonals.append(position - first_position2[code])
+            break
+
+    width = max(BAND_MIN_WIDTH, max(list_length1,list_length2) // BAND_WIDTH_DIVISOR)
+    return min(diagonals) - width, max(diagonals) + width
+
+def bandedMatrix(codes1,codes2,low,high):
+    """
+    Fill the cells of the score matrix between the diagonals low and high.
+
+    The cells are computed like in scorematrix() without --gapextension, cells outside
+    of the band are left out. Every row i holds the columns from max(0, i+low) on.
+
+    return value: tuple (score of the last cell, list of pointer rows)
+    """
+    list_length1 = len(codes1)
+    list_length2 = len(codes2)
+
+    row_high = min(list_length1, high)
+    previous = [PENALTY_GAP_OPENING * j for j in range(row_high+1)]
+    previous_low = 0
+    pointers = [bytearray(row_high+1)]
+    for i in range(1,list_length2+1):
+        row_low = max(0, i+low)
+        row_high = min(list_length1, i+high)
+        table_row = score_table[codes2[i-1]]
+        current = []
+        ptr_row = bytearray(row_high-row_low+1)
+        # columns of the previous row start at previous_low
+        offset = row_low - previous_low
+        previous_length = len(previous)
+        start = row_low
+        if row_low == 0:
+            current.append(PENALTY_GAP_OPENING * i)
+            start = 1
+        for j in range(start,row_high+1):
+            k = j - row_low
+            match = previous[k+offset-1] + table_row[codes1[j-1]]
+            if k > 0:
+                insert = current[k-1] + PENALTY_GAP_OPENING
+            else:
+                insert = None
+            if k+offset < previous_length:
+                delete = previous[k+offset] + PENALTY_GAP_OPENING
+            else:
+                delete = None
+            if (insert is None or match >= insert) and (delete is None or match >= delete):
+                current.append(match)
+                ptr_row[k] = 1
+            elif delete is None or (insert is not None and insert >= delete):
+                current.append(insert)
+                ptr_row[k] = 2
+            else:
+                current.append(delete)
+                ptr_row[k] = 3
+        pointers.append(ptr_row)
+        previous = current
+        previous_low = row_low
+    return previous[-1], pointers
+
+def bandBound(codes1,codes2,low,high):
+    """
+    Return an upper bound of the score of all paths that leave the band, or None.
+
+    A path that reaches the diagonal high+1 has at least high+1 insertions, a path that
+    reaches the diagonal low-1 at least 1-low deletions. The matches of a path use
+    different rows and columns, so D matches score at most the sum of the D best row
+    maxima and the sum of the D best column maxima. None means no path leaves the band.
+    """
+    list_length1 = len(codes1)
+    list_length2 = len(codes2)
+    difference = list_length1 - list_length2
+
+    distinct1 = list(dict.fromkeys(codes1))
+    distinct2 = list(dict.fromkeys(codes2))
+    row_maxima = {code2: max(score_table[code2][code1] for code1 in distinct1)
+                  for code2 in distinct2}
+    column_maxima = {code1: max(score_table[code2][code1] for code2 in distinct2)
+                     for code1 in distinct1}
+    row_sums = [0] + list(itertools.accumulate(sorted((row_maxima[code] for code in codes2),
+                                                       reverse=True)))
+    column_sums = [0] + list(itertools.accumulate(sorted((column_maxima[code] for code in codes1),
+                                                          reverse=True)))
+
+    # a path has I insertions, I - difference deletions and list_length1 - I matches
+    insertions = []
+    if high < list_length1:
+        insertions.append(range(max(high+1, difference, 0), list_length1+1))
+    if low > -list_length2:
+        insertions.append(range(max(1-low+difference, difference, 0), list_length1+1))
+    bound = None
+    for insertion_range in insertions:
+        for insertion in insertion_range:
+            matches = list_length1 - insertion
+            score = (min(row_sums[matches], column_sums[matches])
+                     + (2*insertion - difference) * PENALTY_GAP_OPENING)
+            if bound is None or score > bound:
+                bound = score
+    return bound
+
+def bandedAlignment(name1,name2,value_list1,value_list2):
+    """
+    Align two sequences in a diagonal band and return the alignment record like traceback().
+
+    The band is widened until no path that leaves it can reach the score in the band
+    (see bandBound()). Then all optimal paths and their pointers lie in the band, so the
+    alignment is the same as with scorematrix() and traceback(). Returns None if the band
+    would cover more than half of the matrix.
+    """
+    codes1 = encodeLabels(value_list1)
+    codes2 = encodeLabels(value_list2)
+    if has_empty_fid:
+        checkLabelPairs(value_list1,value_list2,codes1,codes2)
+    list_length1 = len(value_list1)
+    list_length2 = len(value_list2)
+    matrix_cells = (list_length1+1)*(list_length2+1)
+
+    low, high = bandStart(codes1,codes2)
+    while True:
+        band_cells = (list_length2+1)*(high-low+1)
+        if 2*band_cells > matrix_cells:
+            if args.log:
+                logging.debug('The band of %s and %s covers more than half of the matrix.',
+                              name1,name2)
+            return None
+        score, pointers = bandedMatrix(codes1,codes2,low,high)
+        bound = bandBound(codes1,codes2,low,high)
+        if bound is None or bound < score:
+            break
+        # widen the band on both sides
+        width = high - low
+        low = low - width
+        high = high + width
+
+    # follow the pointers from the end like traceback()
+    moves = []
+    i = list_length2
+    j = list_length1
+    while i > 0 or j > 0:
+        pointer = 0
+        if i > 0 and j > 0:
+            pointer = pointers[i][j - max(0, i+low)]
+        if pointer == 1:
+            moves.append(1)
+            i = i - 1
+            j = j - 1
+        elif i > 0 and (pointer == 3 or j == 0):
+            moves.append(3)
+            i = i - 1
+        else:
+            moves.append(2)
+            j = j - 1
+
+    if args.log:
+        logging.debug('Function bandedAlignment() is executed with %s of %s cells.',
+                      band_cells, matrix_cells)
+
+    return pathRecord(name1,name2,value_list1,value_list2,moves,score)
+
+def useBandedAlignment(sequence_length1,sequence_length2):
+    """Return True if the pair is aligned with bandedAlignment() first."""
+    return args.banded and not args.gapextension and sequence_length1 > 0 and sequence_length2 > 0
+
+def useLinearMemory(sequence_length1,sequence_length2):
+    """Return True if the pair is aligned with linearMemoryAlignment()."""
+    if args.linearmemory:
+        return True
+    return (sequence_length1+1)*(sequence_length2+1) > args.linearmemorythreshold
+
+def scoreOnlyAlignment(name1,name2,value_list1,value_list2):
+    """
+    Return the alignment record without the alignment strings, computed with two rows.
+
+    Every cell carries the length and the number of zero matches of the path that traceback()
+    would follow from it, so score, length and normalized score are the same as with traceback().
+    """
+    codes1 = encodeLabels(value_list1)
+    codes2 = encodeLabels(value_list2)
+    if has_empty_fid:
+        checkLabelPairs(value_list1,value_list2,codes1,codes2)
+    list_length1 = len(value_list1)
+
+    previous = [PENALTY_GAP_OPENING * j for j in range(list_length1+1)]
+    previous_ptr = bytearray(list_length1+1)
+    previous_length = list(range(list_length1+1))
+    previous_zeros = [0] * (list_length1+1)
+    is_insertion = False
+    for i in range(1,len(value_list2)+1):
+        table_row = score_table[codes2[i-1]]
+        row_is_zero = codes2[i-1] == 0
+        current = [PENALTY_GAP_OPENING * i]
+        current_ptr = bytearray(list_length1+1)
+        current_length = [i]
+        current_zeros = [0]
+        k = 1
+        for code in codes1:
+            match = previous[k-1] + table_row[code]
+            insert = current[k-1] + PENALTY_GAP_OPENING
+            delete = previous[k] + PENALTY_GAP_OPENING
+            if match >= insert and match >= delete:
+                current.append(match)
+                current_ptr[k] = 1
+                current_length.append(previous_length[k-1]+1)
+                current_zeros.append(previous_zeros[k-1] + (row_is_zero and code == 0))
+                is_insertion = False
+            elif insert >= delete:
+                if args.gapextension and is_insertion:
+                    insert = current[k-1] + PENALTY_GAP_EXTENSION
+                current.append(insert)
+                current_ptr[k] = 2
+                current_length.append(current_length[k-1]+1)
+                current_zeros.append(current_zeros[k-1])
+                is_insertion = True
+            else:
+                if args.gapextension and previous_ptr[k] == 3:
+                    delete = previous[k] + PENALTY_GAP_EXTENSION
+                current.append(delete)
+                current_ptr[k] = 3
+                current_length.append(previous_length[k]+1)
+                current_zeros.append(previous_zeros[k])
+                is_insertion = False
+            k = k + 1
+        previous, previous_ptr = current, current_ptr
+        previous_length, previous_zeros = current_length, current_zeros
+
+    return alignmentRecord(name1,name2,str(previous[-1]),previous_length[-1],None,None,
+                           previous_zeros[-1])
+
+def computeScorematrix(sequence_length1,sequence_length2,value_list1,value_list2):
+    """Fill the score matrix and ptr_matrix with the engine selected by --engine."""
+    if args.engine == 'numpy':
+        return scorematrix_numpy(sequence_length1,sequence_length2,value_list1,value_list2)
+    # the run-length engine needs linear gap penalties, otherwise use the python engine
+    if args.engine == 'runlength' and not args.gapextension:
+        return scorematrix_runlength(sequence_length1,sequence_length2,value_list1,value_list2)
+    return scorematrix(sequence_length1,sequence_length2,value_list1,value_list2)
+
+def traceback(name1,name2,value_list1,value_list2, matrix):
+    """Go back through the matrix with information about the matches and align the sequences.
+
+    arguments:
+    name1 -- Name of sequence 1
+    name2 -- Name of sequence 2
+    value_list1 -- String of sequence 1
+    value_list2 -- String of sequence 2
+    matrix -- matrix filled with scores by scorematrix()
+    
+    return value: alignment record for writeAlignment()
+    """
+
+    # initialize variables
+    AlignmentA = ''
+    AlignmentB = ''
+    GAP_CHARACTER = '-'
+    list_length1 = len(value_list1)
+    list_length2 = len(value_list2)
+    i = list_length2
+    j = list_length1
+    list_index_1 = i-1
+    list_index_2 = j-1
+    number_of_zero_matches = 0
+    # compute alignment as in Needleman-Wunsch algorithm
+    while i>0 or j>0:
+        if i>0 and j > 0 and ptr_matrix[i][j] == 1: # match, go diag
+            AlignmentA = str(value_list2[list_index_1]) + ',' + AlignmentA
+            AlignmentB = str(value_list1[list_index_2]) + ',' + AlignmentB
+            if value_list2[list_index_1] == '0' and value_list1[list_index_2] == '0':
+                number_of_zero_matches += 1
+            list_index_1 = list_index_1-1
+            i = i - 1
+            list_index_2 = list_index_2-1
+            j = j - 1
+        elif i>0 and (ptr_matrix[i][j] == 3 or j==0): # deletion or edge of the matrix
+            AlignmentA = str(value_list2[list_index_1]) + ',' + AlignmentA
+            AlignmentB = GAP_CHARACTER + ',' + AlignmentB
+            list_index_1 = list_index_1-1
+            i = i - 1
+        elif j>0 and (ptr_matrix[i][j] == 2 or i==0): # insertion or edge of the matrix
+            AlignmentA = GAP_CHARACTER + ',' + AlignmentA
+            AlignmentB = str(value_list1[list_index_2]) + ',' + AlignmentB
+            j = j - 1
+            list_index_2 = list_index_2-1
+        else:
+            print('error in traceback')
+            if args.log:
+                logging.critical('error in traceback')
+            sys.exit(1)
+
+    # prepare Strings for writing
+    AlignmentA = AlignmentA.strip(',')
+    AlignmentB = AlignmentB.strip(',')
+    score_alignment = str(matrix[list_length2][list_length1])
+    alignmentlength = len(AlignmentA.split(','))
+
+    return alignmentRecord(name1,name2,score_alignment,alignmentlength,AlignmentA,AlignmentB,
+                           number_of_zero_matches)
+
+def alignmentRecord(name1,name2,score_alignment,alignmentlength,AlignmentA,AlignmentB,
+                    number_of_zero_matches):
+    """
+    Return the alignment record with the normalized score for writeAlignment().
+
+    The record is a tuple (name1, name2, score, length of alignment, normalized score,
+    AlignmentA, AlignmentB, number of zero matches). The alignments are None with --score-only.
+    """
+
+    # normalize the alignment score over length of alignment
+    # (divide score_alignment by length of alignment minus number of "0 matches")
+    try:
+        score_alignment_normalized = int(score_alignment) / (int(alignmentlength-number_of_zero_matches))
+    except ZeroDivisionError as e:
+        print('An error occurred in traceback(): Sequence without protein domain '
+              'found. Please run the program again with reasonable input.')
+        if args.log:
+            logging.critical('An error occured in traceback(): Sequence without '
+                             'protein domain found. Please run the program again with reasonable '
+                             'input. Error: %s.',e)
+        sys.exit(1)
+
+    return (name1, name2, score_alignment, alignmentlength, score_alignment_normalized,
+            AlignmentA, AlignmentB, number_of_zero_matches)
+
+class OutputWriter:
+    """
+    Long-lived writer for an output file.
+
+    The text is collected in a buffer and written when the buffer holds at least
+    buffer_size characters and when the writer is closed. The file is opened at the
+    first write in append mode, with compress as gzip file. If stream is given, the
+    text is written to this open stream instead, which is flushed after every write
+    and not closed.
+    """
+
+    def __init__(self,filename,buffer_size,compress,stream=None):
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self.compress = compress
+        self.stream = stream
+        self.parts = []
+        self.size = 0
+        self.file = stream
+
+    def write(self,text):
+        """Add text to the buffer and write the buffer if it is full."""
+        self.parts.append(text)
+        self.size = self.size + len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffer into the file."""
+        if not self.parts:
+            return
+        if metrics is not None:
+            started = metrics.start()
+        if self.file is None:
+            if self.compress:
+                self.file = gzip.open(self.filename, 'at', encoding="utf-8")
+            else:
+                self.file = open(self.filename, 'a', encoding="utf-8")
+        text = ''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        self.file.write(text)
+        if self.stream is not None:
+            self.file.flush()
+        if metrics is not None:
+            metrics.stop('io',started)
+
+    def close(self):
+        """Write the buffer and close the file."""
+        self.flush()
+        if self.stream is not None:
+            timed('io',self.stream.flush)
+        elif self.file is not None:
+            timed('io',self.file.close)
+            self.file = None
+
+def outputFilename(prefix,extension=None):
+    """
+    Return the name of an output file, with .gz if --compress is set.
+
+    If extension is given, it replaces the extension of the input file and the file
+    is not compressed.
+    """
+    if args.shard:
+        prefix = prefix + 'shard%dof%d_' % shardNumbers(args.shard)
+    filename = timestamp+'_'+prefix+inputName()
+    if extension is not None:
+        return os.path.splitext(filename)[0] + extension
+    if args.compress:
+        filename = filename + '.gz'
+    return filename
+
+def openOutputFiles(list_with_all_sequences,output_stream=None):
+    """
+    Create the writers for the alignment file and, with --verbose, the verbose file.
+
+    With --stdout the alignments are written to output_stream after every alignment.
+    """
+    global alignment_writer
+    global verbose_writer
+
+    if args.stdout:
+        alignment_writer = OutputWriter(None, 0, False, output_stream)
+    else:
+        alignment_writer = OutputWriter(outputFilename('alignments_'), args.buffersize,
+                                        args.compress)
+    verbose_writer = None
+    if args.verbose:
+        verbose_writer = OutputWriter(outputFilename('file_alignments_verbose_'),
+                                      args.buffersize, args.compress)
+    if args.matrix:
+        openScoreMatrices(list_with_all_sequences)
+
+def closeOutputFiles():
+    """Write the rest of the buffers and close the output files."""
+    for writer in (alignment_writer, verbose_writer):
+        if writer is not None:
+            writer.close()
+    closeScoreMatrices()
+
+def openScoreMatrices(list_with_all_sequences):
+    """
+    Create the N x N score matrices of --matrix as memory-mapped .npy files and the index file.
+
+    The raw scores are stored as int32, the normalized scores as float32. Every row and column
+    belongs to the sequence in the same line of the index file. Without self-alignments the
+    diagonal of the normalized scores is NaN.
+    """
+    global score_matrices
+
+    number_of_sequences = len(list_with_all_sequences)
+    shape = (number_of_sequences, number_of_sequences)
+    # a run resumed with --checkpoint continues its matrices
+    resumed = checkpoint is not None and checkpoint.done > 0
+    try:
+        if resumed:
+            raw_scores = np.lib.format.open_memmap(outputFilename('scores_', '.npy'), mode='r+')
+            normalized_scores = np.lib.format.open_memmap(
+                outputFilename('normalized_scores_', '.npy'), mode='r+')
+            if raw_scores.shape != shape or normalized_scores.shape != shape:
+                raise ValueError('the matrices of the checkpoint have another size')
+        else:
+            raw_scores = np.lib.format.open_memmap(outputFilename('scores_', '.npy'), mode='w+',
+                                                   dtype=np.int32, shape=shape)
+            normalized_scores = np.lib.format.open_memmap(
+                outputFilename('normalized_scores_', '.npy'), mode='w+', dtype=np.float32,
+                shape=shape)
+        with open(outputFilename('matrix_index_', '.txt'), 'w', encoding="utf-8") as index_file:
+            for entry in list_with_all_sequences:
+                index_file.write(entry.name + '\n')
+    except (IOError, ValueError) as e:
+        print('The score matrices cannot be created:', e)
+        if args.log:
+            logging.critical('Error in openScoreMatrices(): %s', e)
+        sys.exit(1)
+    # pairs that are not aligned or filtered are NaN in the normalized scores
+    if not resumed:
+        if cluster_partners is not None or args.min_score is not None or args.top_k:
+            normalized_scores[:] = np.nan
+        elif args.noselfalignment:
+            np.fill_diagonal(normalized_scores, np.nan)
+    score_matrices = (raw_scores, normalized_scores)
+
+    if args.log:
+        logging.info('Score matrices of size %s x %s created.',
+                     str(number_of_sequences), str(number_of_sequences))
+
+def storeScores(task,record):
+    """Store the scores of a task from alignmentTasks() in the score matrices."""
+    raw_scores, normalized_scores = score_matrices
+    i = task[0]
+    j = task[-1]
+    raw_scores[i,j] = raw_scores[j,i] = int(record[2])
+    normalized_scores[i,j] = normalized_scores[j,i] = record[4]
+
+def closeScoreMatrices():
+    """Write the score matrices to disk."""
+    global score_matrices
+
+    if score_matrices is not None:
+        for matrix in score_matrices:
+            matrix.flush()
+        score_matrices = None
+
+class AlignmentCache:
+    """
+    Persistent cache of alignment records in an SQLite file.
+
+    The key is a hash of both label lists, the current weights and --gapextension, so a
+    cached record is only used for the same sequences and the same scoring. Every stored
+    record gets a new use number; when a new record makes the cache hold more than
+    max_entries records, the record with the lowest number is deleted, so the file stays
+    within the bound during the run. Records that another run added to the same file are
+    deleted when the cache is closed.
+
+    The file is opened at the first lookup or store, so that worker processes forked
+    before do not share the connection of the main process.
+    """
+
+    def __init__(self,path,max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = None
+        self.scoring = repr((getWeights(), bool(args.gapextension)))
+        self.pending = 0
+        self.hits = 0
+        self.last_used = 0
+        self.entries = 0
+
+    def connect(self):
+        """Open the file and create the table if it does not exist."""
+        if self.connection is not None:
+            return
+        self.connection = sqlite3.connect(self.path, timeout=60)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS alignments ('
+                                'key TEXT PRIMARY KEY, score TEXT, length INTEGER, '
+                                'zero_matches INTEGER, alignment_a TEXT, alignment_b TEXT, '
+                                'last_used INTEGER)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS alignments_last_used '
+                                'ON alignments (last_used)')
+        self.connection.commit()
+        self.last_used, self.entries = self.connection.execute(
+            'SELECT COALESCE(MAX(last_used), 0), COUNT(*) FROM alignments').fetchone()
+
+    def key(self,value_list1,value_list2):
+        """Return the key of the alignment of two label lists."""
+        text = self.scoring + '\n' + ','.join(value_list1) + '\n' + ','.join(value_list2)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def lookup(self,name1,name2,value_list1,value_list2):
+        """Return the cached record of an alignment or None, also if the alignments are missing."""
+        self.connect()
+        row = self.connection.execute(
+            'SELECT score, length, zero_matches, alignment_a, alignment_b FROM alignments '
+            'WHERE key = ?', (self.key(value_list1,value_list2),)).fetchone()
+        if row is None or (row[3] is None and not args.score_only):
+            return None
+        self.hits = self.hits + 1
+        score_alignment, alignmentlength, number_of_zero_matches, AlignmentA, AlignmentB = row
+        if args.score_only:
+            AlignmentA = AlignmentB = None
+        return alignmentRecord(name1,name2,score_alignment,alignmentlength,AlignmentA,AlignmentB,
+                               number_of_zero_matches)
+
+    def store(self,value_list1,value_list2,record):
+        """Store a record or mark it as used, keep stored alignments of a --score-only record."""
+        self.connect()
+        self.last_used = self.last_used + 1
+        key = self.key(value_list1,value_list2)
+        inserted = self.connection.execute(
+            'INSERT INTO alignments VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO NOTHING',
+            (key, record[2], record[3], record[7], record[5], record[6],
+             self.last_used)).rowcount
+        if inserted:
+            self.entries = self.entries + 1
+            if self.entries > self.max_entries:
+                self.evict()
+        else:
+            self.connection.execute(
+                'UPDATE alignments SET last_used = ?, '
+                'alignment_a = COALESCE(?, alignment_a), alignment_b = COALESCE(?, alignment_b) '
+                'WHERE key = ?', (self.last_used, record[5], record[6], key))
+        self.pending = self.pending + 1
+        if self.pending >= CACHE_COMMIT_INTERVAL:
+            self.connection.commit()
+            self.pending = 0
+
+    def evict(self):
+        """Delete the least recently used records until max_entries records are left."""
+        self.connection.execute(
+            'DELETE FROM alignments WHERE key IN (SELECT key FROM alignments '
+            'ORDER BY last_used LIMIT ?)', (self.entries - self.max_entries,))
+        self.entries = self.max_entries
+
+    def close(self):
+        """Delete the least recently used records above max_entries and close the file."""
+        if self.connection is None:
+            return
+        self.connection.execute(
+            'DELETE FROM alignments WHERE key IN (SELECT key FROM alignments '
+            'ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
+
+def openCache():
+    """Open the alignment cache of --cache."""
+    global alignment_cache
+
+    try:
+        alignment_cache = AlignmentCache(args.cache, args.cachesize)
+        # check that the file can be used before the alignments are computed
+        alignment_cache.connect()
+        alignment_cache.close()
+    except sqlite3.Error as e:
+        print('The alignment cache cannot be opened:', e)
+        if args.log:
+            logging.critical('Error in openCache(): %s', e)
+        sys.exit(1)
+
+def closeCache():
+    """Log the cache hits and close the alignment cache."""
+    global alignment_cache
+
+    if alignment_cache is not None:
+        # with --jobs the cache is read in the worker processes
+        if args.log and args.jobs == 1:
+            logging.info('%s alignments were read from the cache.', str(alignment_cache.hits))
+        alignment_cache.close()
+        alignment_cache = None
+
+class ScoreFilter:
+    """
+    Write only the alignments with a normalized score of at least --min-score and, with
+    --top-k, only the pairs that are among the k best partners of one of their sequences.
+
+    Tasks whose normalized score cannot reach the threshold are not aligned, the upper bound
+    is computed from the labels of both sequences (see upperBound()). The written alignments
+    are the same as without pruning. With --top-k the alignments are written at the end of
+    the run in the order of the tasks, because the best partners are only known then. Ties
+    with the k-th best score are kept. Self-alignments are not ranked, only --min-score
+    applies to them. The kept records are passed to write, writeResult() by default.
+    """
+
+    def __init__(self,list_with_all_sequences,min_score,top_k,write=None):
+        self.min_score = min_score
+        self.top_k = top_k
+        self.write = write if write is not None else writeResult
+        self.compositions = [collections.Counter(encodeLabels(entry.labels))
+                             for entry in list_with_all_sequences]
+        # k best normalized scores of every sequence as min-heap
+        self.best = [[] for entry in list_with_all_sequences]
+        self.candidates = []
+        self.pruned = 0
+        self.filtered = 0
+
+        # a gap scores at most the larger gap penalty, positive penalties give no bound
+        if args.gapextension:
+            self.gap = max(PENALTY_GAP_OPENING, PENALTY_GAP_EXTENSION)
+        else:
+            self.gap = PENALTY_GAP_OPENING
+        if self.gap > 0:
+            self.gap = None
+
+    def upperBound(self,task):
+        """
+        Return an upper bound of the normalized score of a task, or None if there is none.
+
+        Every label of a sequence scores at most its best label pair with the other sequence
+        or a gap, so the sum over either sequence bounds the score. The length of the
+        alignment without "0 matches" is at least the length of the longer sequence minus
+        the smaller number of '0' labels and at most the sum of both lengths.
+        """
+        if self.gap is None:
+            return None
+        composition1 = self.compositions[task[0]]
+        composition2 = self.compositions[task[-1]]
+
+        bounds = []
+        for compositionA, compositionB in ((composition1, composition2),
+                                           (composition2, composition1)):
+            bound = 0
+            for codeA, count in compositionA.items():
+                best = self.gap
+                for codeB in compositionB:
+                    score = score_table[codeB][codeA]
+                    # empty F-IDs stop the program in the alignment
+                    if score is None:
+                        return None
+                    best = max(best, score)
+                bound = bound + count*best
+            bounds.append(bound)
+        score_bound = min(bounds)
+
+        sequence_length1 = sum(composition1.values())
+        sequence_length2 = sum(composition2.values())
+        shortest = max(sequence_length1, sequence_length2) - min(composition1[0], composition2[0])
+        # the normalization of a task without domains stops the program
+        if shortest <= 0:
+            return None
+        if score_bound > 0:
+            return score_bound / shortest
+        return score_bound / (sequence_length1+sequence_length2)
+
+    def threshold(self,i):
+        """Return the k-th best normalized score of sequence i so far."""
+        if len(self.best[i]) < self.top_k:
+            return -math.inf
+        return self.best[i][0]
+
+    def prune(self,task):
+        """Return True if the alignment of a task cannot be written."""
+        bound = self.upperBound(task)
+        if bound is None:
+            return False
+        if self.min_score is not None and bound < self.min_score:
+            return True
+        if self.top_k and len(task) == 2:
+            return bound < self.threshold(task[0]) and bound < self.threshold(task[1])
+        return False
+
+    def add(self,task,record):
+        """Write the record of a task if it passes --min-score, keep it with --top-k."""
+        score_alignment_normalized = record[4]
+        if self.min_score is not None and score_alignment_normalized < self.min_score:
+            self.filtered = self.filtered + 1
+            return
+        if not self.top_k:
+            self.write(task,record)
+            return
+
+        if len(task) == 2:
+            is_candidate = False
+            for i in task:
+                if len(self.best[i]) < self.top_k:
+                    heapq.heappush(self.best[i], score_alignment_normalized)
+                    is_candidate = True
+                elif score_alignment_normalized >= self.best[i][0]:
+                    heapq.heappushpop(self.best[i], score_alignment_normalized)
+                    is_candidate = True
+            if not is_candidate:
+                self.filtered = self.filtered + 1
+                return
+        self.candidates.append((task, record))
+
+    def close(self):
+        """Write the kept records of --top-k that are among the k best partners at the end."""
+        for task, record in self.candidates:
+            if (len(task) == 2 and record[4] < self.threshold(task[0])
+                    and record[4] < self.threshold(task[1])):
+                self.filtered = self.filtered + 1
+                continue
+            self.write(task,record)
+        self.candidates = []
+
+def openScoreFilter(list_with_all_sequences):
+    """Set up the filter of --min-score and --top-k."""
+    global score_filter
+
+    score_filter = ScoreFilter(list_with_all_sequences, args.min_score, args.top_k)
+    # the alignments filtered before the checkpoint of a resumed run
+    if checkpoint is not None:
+        score_filter.filtered = checkpoint.filtered
+    if score_filter.gap is None and args.log:
+        logging.warning('No alignments are pruned with positive gap penalties, '
+                        'they are only filtered after the alignment.')
+
+def closeScoreFilter():
+    """Write the alignments kept for --top-k and log the pruned alignments."""
+    global score_filter
+    global number_of_filtered_alignments
+
+    if score_filter is not None:
+        score_filter.close()
+        number_of_filtered_alignments = score_filter.pruned + score_filter.filtered
+        if args.log:
+            logging.info('%s alignments were pruned by their upper bound and not computed, '
+                         '%s computed alignments were filtered by --min-score or --top-k.',
+                         str(score_filter.pruned), str(score_filter.filtered))
+        score_filter = None
+
+def prunedEntries(entries):
+    """
+    Leave out the entries from alignmentEntries() that the score filter prunes.
+
+    Only entries that would be aligned are pruned, an entry that reuses the record of its
+    representative task is passed to the filter, so that taskRecord() releases the record
+    after its last task. If the entry that computes the record of a representative task is
+    pruned, the next entry of the representative task that is not pruned computes it.
+    """
+    dropped = set()
+    for entry in entries:
+        task, representative_task, compute, keep, previous = entry
+        if (previous is None and (compute or representative_task in dropped)
+                and score_filter.prune(task)):
+            score_filter.pruned = score_filter.pruned + 1
+            if providesRecord(entry):
+                dropped.add(representative_task)
+            continue
+        if not compute and previous is None and representative_task in dropped:
+            dropped.discard(representative_task)
+            entry = (task, representative_task, True, keep, previous)
+        yield entry
+
+class RunMetrics:
+    """
+    Wall and CPU time of the phases of a run and the size of the score matrices for --metrics.
+
+    A phase is timed around its calls with call(), or with start() and stop(). The callers
+    check that metrics is set first, so a run without --metrics does not read the clocks.
+    With --jobs every worker measures its own phases and sends them with its chunks, the
+    times of the workers are added up.
+    """
+
+    def __init__(self):
+        # phase -> [calls, wall time, CPU time]
+        self.phases = {}
+        self.matrices = 0
+        self.cells = 0
+        self.largest_matrix = (0, 0)
+        self.started = self.start()
+
+    def start(self):
+        """Return the current wall and CPU time for stop()."""
+        return time.perf_counter(), time.process_time()
+
+    def stop(self,phase,started):
+        """Add the time since started (from start()) to phase."""
+        wall = time.perf_counter() - started[0]
+        cpu = time.process_time() - started[1]
+        values = self.phases.get(phase)
+        if values is None:
+            self.phases[phase] = [1, wall, cpu]
+        else:
+            values[0] = values[0] + 1
+            values[1] = values[1] + wall
+            values[2] = values[2] + cpu
+
+    def call(self,phase,function,*arguments):
+        """Call function and add its time to phase."""
+        started = self.start()
+        try:
+            return function(*arguments)
+        finally:
+            self.stop(phase,started)
+
+    def addMatrix(self,sequence_length1,sequence_length2):
+        """Count the cells of a score matrix for two sequences."""
+        cells = (sequence_length1+1) * (sequence_length2+1)
+        self.matrices = self.matrices + 1
+        self.cells = self.cells + cells
+        if cells > (self.largest_matrix[0]+1) * (self.largest_matrix[1]+1):
+            self.largest_matrix = (sequence_length1, sequence_length2)
+
+    def snapshot(self):
+        """Return the measurements since the last snapshot of a worker for merge()."""
+        values = (self.phases, self.matrices, self.cells, self.largest_matrix)
+        self.phases = {}
+        self.matrices = 0
+        self.cells = 0
+        self.largest_matrix = (0, 0)
+        return values
+
+    def merge(self,values):
+        """Add the measurements of a worker from snapshot()."""
+        phases, matrices, cells, largest_matrix = values
+        for phase, (calls, wall, cpu) in phases.items():
+            own = self.phases.setdefault(phase, [0, 0.0, 0.0])
+            own[0] = own[0] + calls
+            own[1] = own[1] + wall
+            own[2] = own[2] + cpu
+        self.matrices = self.matrices + matrices
+        self.cells = self.cells + cells
+        if ((largest_matrix[0]+1) * (largest_matrix[1]+1)
+                > (self.largest_matrix[0]+1) * (self.largest_matrix[1]+1)):
+            self.largest_matrix = largest_matrix
+
+    def report(self):
+        """Return the measurements as dict for the JSON file."""
+        wall = time.perf_counter() - self.started[0]
+        cpu = time.process_time() - self.started[1]
+        # the cells are filled by the phases that compute score matrices
+        matrix_time = sum(self.phases[phase][1] for phase in MATRIX_PHASES
+                          if phase in self.phases)
+        phases = {}
+        for phase, (calls, phase_wall, phase_cpu) in self.phases.items():
+            phases[phase] = {'calls': calls, 'wall_seconds': phase_wall,
+                             'cpu_seconds': phase_cpu}
+        rows, columns = self.largest_matrix
+        report = {
+            'input': args.filename, 'engine': args.engine, 'jobs': args.jobs,
+            'wall_seconds': wall, 'cpu_seconds': cpu,
+            'alignments': number_of_alignments,
+            'filtered_alignments': number_of_filtered_alignments,
+            'phases': phases,
+            'matrices': self.matrices, 'cells': self.cells,
+            'cells_per_second': self.cells / matrix_time if matrix_time > 0 else None,
+            'largest_matrix': {'rows': rows+1, 'columns': columns+1,
+                               'cells': (rows+1) * (columns+1)},
+            'peak_memory_bytes': None, 'peak_memory_workers_bytes': None,
+        }
+        if resource is not None:
+            # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+            unit = 1 if sys.platform == 'darwin' else 1024
+            report['peak_memory_bytes'] = (
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit)
+            if args.jobs > 1:
+                report['peak_memory_workers_bytes'] = (
+                    resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit)
+        return report
+
+def timed(phase,function,*arguments):
+    """Call function, with --metrics its time is added to phase."""
+    if metrics is None:
+        return function(*arguments)
+    return metrics.call(phase,function,*arguments)
+
+def openMetrics():
+    """Start the measurements of --metrics and check that the JSON file can be written."""
+    global metrics
+
+    try:
+        with open(args.metrics, 'w', encoding="utf-8"):
+            pass
+    except OSError as e:
+        print('The file for --metrics cannot be written:', e)
+        if args.log:
+            logging.critical('Error in openMetrics(): %s', e)
+        sys.exit(1)
+    metrics = RunMetrics()
+
+def closeMetrics():
+    """Write the measurements of --metrics into the JSON file."""
+    global metrics
+
+    if metrics is not None:
+        with open(args.metrics, 'w', encoding="utf-8") as outfile:
+            json.dump(metrics.report(), outfile, indent=2)
+            outfile.write('\n')
+        if args.log:
+            logging.info('The metrics of the run were written to %s.', args.metrics)
+        metrics = None
+
+def profiledAlignAllPairs(list_with_all_sequences):
+    """Run alignAllPairs() with cProfile and write the statistics to the file of --profile."""
+    profile = cProfile.Profile()
+    try:
+        profile.runcall(timed, 'alignAllPairs', alignAllPairs, list_with_all_sequences)
+    finally:
+        profile.dump_stats(args.profile)
+        if args.log:
+            logging.info('The profile of the alignments was written to %s.', args.profile)
+
+class Checkpoint:
+    """
+    Progress of a run with --checkpoint, so that a stopped run can be resumed.
+
+    The file stores the timestamp of the output files, the number of tasks written in the
+    order of alignedRecords(), the sizes of the output files after these tasks and the
+    counters of logStats(). It is written at the start and then every --checkpoint-interval
+    seconds, after the output files are written up to this point, through a temporary file
+    that replaces the old one. A resumed run cuts the output files to the stored sizes, so the
+    records written after the last checkpoint are computed and written again.
+    """
+
+    def __init__(self,path,interval):
+        self.path = path
+        self.interval = interval
+        self.done = 0
+        self.filtered = 0
+        self.saved = time.monotonic()
+
+    def fingerprint(self):
+        """Return the input file and the options that change the output files."""
+        stat = os.stat(args.filename)
+        options = {key: value for key, value in sorted(vars(args).items())
+                   if key not in CHECKPOINT_FREE_OPTIONS}
+        return {'input': os.path.abspath(args.filename), 'input_size': stat.st_size,
+                'input_mtime_ns': stat.st_mtime_ns, 'options': options}
+
+    def load(self):
+        """Read the checkpoint file, return its state or None if it does not match this run."""
+        with open(self.path, 'r', encoding="utf-8") as infile:
+            state = json.load(infile)
+        if state.get('fingerprint') != json.loads(json.dumps(self.fingerprint())):
+            return None
+        self.done = state['done']
+        self.filtered = state['filtered_alignments']
+        return state
+
+    def advance(self):
+        """Count a written task and save the progress if the interval has passed."""
+        self.done = self.done + 1
+        if time.monotonic() - self.saved >= self.interval:
+            self.save()
+
+    def save(self):
+        """Write the output files up to the current task and store the progress."""
+        for writer in (alignment_writer, verbose_writer):
+            if writer is not None:
+                # a closed writer opens its file again in append mode, with --compress
+                # as a new gzip member, so the stored size ends at a complete member
+                writer.close()
+        if score_matrices is not None:
+            for matrix in score_matrices:
+                matrix.flush()
+        if score_filter is not None:
+            self.filtered = score_filter.filtered
+        state = {
+            'fingerprint': self.fingerprint(), 'timestamp': timestamp, 'done': self.done,
+            'sizes': {filename: (os.path.getsize(filename) if os.path.exists(filename) else 0)
+                      for filename in checkpointFiles()},
+            'number_of_alignments': number_of_alignments,
+            'number_of_lines_in_outfile': number_of_lines_in_outfile,
+            'filtered_alignments': self.filtered,
+        }
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w', encoding="utf-8") as outfile:
+            json.dump(state, outfile, indent=2)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temporary_path, self.path)
+        self.saved = time.monotonic()
+        if args.log:
+            logging.debug('Checkpoint saved after %s alignments.', str(self.done))
+
+def checkpointFiles():
+    """Return the names of the output files that --checkpoint continues."""
+    filenames = [outputFilename('alignments_')]
+    if args.verbose:
+        filenames.append(outputFilename('file_alignments_verbose_'))
+    return filenames
+
+def openCheckpoint():
+    """
+    Start the progress of --checkpoint, or resume the run stored in its file.
+
+    A resumed run takes the timestamp of the stopped run, so it continues its output files.
+    """
+    global checkpoint
+    global timestamp
+    global number_of_alignments
+    global number_of_lines_in_outfile
+
+    checkpoint = Checkpoint(args.checkpoint, args.checkpoint_interval)
+    if not os.path.exists(args.checkpoint):
+        checkpoint.save()
+        return
+
+    try:
+        state = checkpoint.load()
+    except (OSError, ValueError, KeyError) as e:
+        print('The checkpoint file cannot be read:', e)
+        if args.log:
+            logging.critical('Error in openCheckpoint(): %s', e)
+        sys.exit(1)
+    if state is None:
+        print('The checkpoint file belongs to a run with another input file or other options. '
+              'Please use the same input and options or remove the checkpoint file.')
+        if args.log:
+            logging.critical('The checkpoint file %s does not match the input and the options.',
+                             args.checkpoint)
+        sys.exit(1)
+
+    # continue the output files of the stopped run without the records after the checkpoint
+    timestamp = state['timestamp']
+    for filename in checkpointFiles():
+        size = state['sizes'].get(filename, 0)
+        if os.path.exists(filename):
+            with open(filename, 'r+b') as outfile:
+                outfile.truncate(size)
+        elif size > 0:
+            print('The output file ' + filename + ' of the checkpoint does not exist.')
+            if args.log:
+                logging.critical('The output file %s of the checkpoint does not exist.', filename)
+            sys.exit(1)
+    number_of_alignments = state['number_of_alignments']
+    number_of_lines_in_outfile = state['number_of_lines_in_outfile']
+    if args.log:
+        logging.info('The run of %s is resumed after %s alignments.', timestamp,
+                     str(checkpoint.done))
+
+def closeCheckpoint():
+    """Remove the file of --checkpoint after the run is complete."""
+    global checkpoint
+
+    if checkpoint is not None:
+        if os.path.exists(checkpoint.path):
+            os.remove(checkpoint.path)
+        checkpoint = None
+
+def entryRange(entries,start,end=None):
+    """
+    Yield the entries from alignmentEntries() with an index from start to end (exclusive).
+
+    Used to leave out the entries written before a run with --checkpoint stopped and the
+    entries of other shards of --shard. If a left out entry provided the record of a
+    representative task (computed or from --previous), the next entry of the representative
+    task computes it again, unless that entry has its own record from --previous.
+    """
+    dropped = set()
+    for index, entry in enumerate(entries):
+        if end is not None and index >= end:
+            return
+        task, representative_task, compute, keep, previous = entry
+        if index < start:
+            if providesRecord(entry):
+                dropped.add(representative_task)
+            continue
+        if representative_task in dropped:
+            if previous is not None:
+                dropped.discard(representative_task)
+            elif not compute:
+                dropped.discard(representative_task)
+                entry = (task, representative_task, True, keep, previous)
+        yield entry
+
+def shardNumbers(value):
+    """Return (K, N) of the option --shard K/N, None if it is not a valid shard."""
+    match = re.fullmatch(r'(\d+)/(\d+)', value)
+    if match is None:
+        return None
+    shard_number = int(match.group(1))
+    number_of_shards = int(match.group(2))
+    if not 1 <= shard_number <= number_of_shards:
+        return None
+    return shard_number, number_of_shards
+
+def taskCells(task,list_with_all_sequences):
+    """Return the estimated number of matrix cells of a task from alignmentTasks()."""
+    return (len(list_with_all_sequences[task[0]].labels)
+            * len(list_with_all_sequences[task[-1]].labels))
+
+def setShardRange(list_with_all_sequences):
+    """
+    Select the tasks of the shard of --shard K/N.
+
+    The tasks of alignmentTasks() are split in their order into N ranges with about the same
+    number of matrix cells, a task belongs to the shard in which its first cell lies. Every
+    shard writes a consecutive part of the output files of a run without --shard, so that
+    merge only has to join them.
+    """
+    global shard_range
+
+    shard_number, number_of_shards = shardNumbers(args.shard)
+    total_cells = 0
+    number_of_tasks = 0
+    for task in alignmentTasks(list_with_all_sequences):
+        total_cells = total_cells + taskCells(task,list_with_all_sequences)
+        number_of_tasks = number_of_tasks + 1
+
+    start = None
+    end = number_of_tasks
+    pairs = 0
+    selfalignments = 0
+    cells = 0
+    for index, task in enumerate(alignmentTasks(list_with_all_sequences)):
+        task_shard = cells * number_of_shards // total_cells + 1
+        if task_shard > shard_number:
+            end = index
+            break
+        if task_shard == shard_number:
+            if start is None:
+                start = index
+            if len(task) == 2:
+                pairs = pairs + 1
+            else:
+                selfalignments = selfalignments + 1
+        cells = cells + taskCells(task,list_with_all_sequences)
+    if start is None:
+        start = end
+    shard_range = (start, end, pairs, selfalignments, number_of_tasks)
+
+    if args.log:
+        logging.info('Shard %s of %s aligns the tasks %s to %s of %s (%s pairs and %s '
+                     'self-alignments).', str(shard_number), str(number_of_shards), str(start),
+                     str(end), str(number_of_tasks), str(pairs), str(selfalignments))
+
+def inputDigest(filename):
+    """Return the SHA-256 hash of a file as hex string."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as infile:
+        for block in iter(lambda: infile.read(1048576), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def shardOptions():
+    """Return the options that all shards of a run must share."""
+    return {key: value for key, value in sorted(vars(args).items())
+            if key not in CHECKPOINT_FREE_OPTIONS and key not in ('filename', 'shard')}
+
+def writeShardInfo(list_with_all_sequences):
+    """Write the JSON file that describes the shard and its output files for merge."""
+    shard_number, number_of_shards = shardNumbers(args.shard)
+    start, end, pairs, selfalignments, number_of_tasks = shard_range
+    all_pairs, all_selfalignments = expectedAlignments(list_with_all_sequences)
+    info = {
+        'shard': shard_number, 'shards': number_of_shards,
+        'input': os.path.basename(args.filename), 'input_size': os.path.getsize(args.filename),
+        'input_sha256': inputDigest(args.filename), 'options': shardOptions(),
+        'tasks': [start, end], 'number_of_tasks': number_of_tasks,
+        'expected_alignments': all_pairs + all_selfalignments,
+        'shard_alignments': pairs + selfalignments,
+        'alignments': number_of_alignments,
+        'filtered_alignments': number_of_filtered_alignments,
+        'files': {
+            'alignments': outputFilename('alignments_'),
+            'verbose': outputFilename('file_alignments_verbose_') if args.verbose else None,
+            'metrics': args.metrics,
+        },
+    }
+    filename = outputFilename('info_', '.json')
+    with open(filename, 'w', encoding="utf-8") as outfile:
+        json.dump(info, outfile, indent=2)
+        outfile.write('\n')
+    if args.log:
+        logging.info('The description of the shard was written to %s.', filename)
+
+def closeSelection():
+    """Forget the clusters and the shard selected for a run."""
+    global cluster_partners
+    global shard_range
+
+    cluster_partners = None
+    shard_range = None
+
+def stopMerge(message):
+    """Print the reason why the shards cannot be merged and exit."""
+    print('The shards cannot be merged: ' + message)
+    sys.exit(1)
+
+def readShardInfos(paths):
+    """Read the shard files of merge, check that they form one run and sort them by shard."""
+    infos = []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding="utf-8") as infile:
+                info = json.load(infile)
+            info['directory'] = os.path.dirname(path)
+            infos.append(info)
+        except (OSError, ValueError) as e:
+            stopMerge('the shard file ' + path + ' cannot be read (' + str(e) + ').')
+
+    try:
+        infos.sort(key=lambda info: info['shard'])
+        first = infos[0]
+        number_of_shards = first['shards']
+        if [info['shard'] for info in infos] != list(range(1, number_of_shards+1)):
+            stopMerge('the shard files of all ' + str(number_of_shards)
+                      + ' shards are needed, each once.')
+        for info in infos:
+            for key in ('shards', 'input', 'input_size', 'input_sha256', 'options',
+                        'number_of_tasks', 'expected_alignments'):
+                if info[key] != first[key]:
+                    stopMerge('shard ' + str(info['shard']) + ' differs from shard 1 in '
+                              + key + '.')
+        # the shards cover all tasks in their order
+        position = 0
+        for info in infos:
+            if info['tasks'][0] != position:
+                stopMerge('shard ' + str(info['shard']) + ' does not start after the last '
+                          'task of the shard before.')
+            position = info['tasks'][1]
+        if position != first['number_of_tasks']:
+            stopMerge('the shards do not cover all ' + str(first['number_of_tasks']) + ' tasks.')
+        # the counts that logStats() checks
+        for info in infos:
+            if info['alignments'] + info['filtered_alignments'] != info['shard_alignments']:
+                stopMerge('shard ' + str(info['shard']) + ' wrote ' + str(info['alignments'])
+                          + ' and filtered ' + str(info['filtered_alignments'])
+                          + ' alignments, but has ' + str(info['shard_alignments']) + '.')
+        if sum(info['shard_alignments'] for info in infos) != first['expected_alignments']:
+            stopMerge('the shards have ' + str(sum(info['shard_alignments'] for info in infos))
+                      + ' alignments instead of ' + str(first['expected_alignments']) + '.')
+    except (KeyError, TypeError, IndexError) as e:
+        stopMerge('a shard file is incomplete (' + str(e) + ').')
+    return infos
+
+def shardFile(info,filename):
+    """Return the path of an output file of a shard, relative paths are next to its shard file."""
+    if os.path.isabs(filename):
+        return filename
+    return os.path.join(info['directory'], filename)
+
+def countLines(filename,compress):
+    """Return the number of lines of an output file, a gzip file with compress."""
+    opener = gzip.open if compress else open
+    with opener(filename, 'rb') as infile:
+        return sum(block.count(b'\n') for block in iter(lambda: infile.read(1048576), b''))
+
+def mergeFiles(infos,kind,target,lines_per_alignment):
+    """
+    Join the output files of kind ('alignments' or 'verbose') of all shards into target.
+
+    The files are joined as bytes, the gzip files of --compress as gzip members. A shard
+    without alignments has no file.
+    """
+    compress = infos[0]['options']['compress']
+    sources = []
+    for info in infos:
+        filename = info['files'][kind]
+        if filename is None:
+            continue
+        path = shardFile(info,filename)
+        if not os.path.exists(path):
+            if info['alignments'] > 0 and (kind == 'alignments'
+                                           or not info['options']['score_only']):
+                stopMerge('the file ' + path + ' of shard ' + str(info['shard'])
+                          + ' does not exist.')
+            continue
+        lines = countLines(path,compress)
+        if lines != info['alignments'] * lines_per_alignment:
+            stopMerge('the file ' + path + ' has ' + str(lines) + ' lines instead of '
+                      + str(info['alignments'] * lines_per_alignment) + '.')
+        sources.append(path)
+    if not sources:
+        return
+    with open(target, 'wb') as outfile:
+        for path in sources:
+            with open(path, 'rb') as infile:
+                shutil.copyfileobj(infile, outfile, 1048576)
+
+def mergeMetrics(infos,filename):
+    """Add up the --metrics files of all shards and write them into filename."""
+    reports = []
+    for info in infos:
+        if info['files']['metrics'] is None:
+            stopMerge('shard ' + str(info['shard']) + ' was run without --metrics.')
+        path = shardFile(info,info['files']['metrics'])
+        try:
+            with open(path, 'r', encoding="utf-8") as infile:
+                reports.append(json.load(infile))
+        except (OSError, ValueError) as e:
+            stopMerge('the metrics file ' + path + ' cannot be read (' + str(e) + ').')
+
+    merged = {'input': infos[0]['input'], 'shards': len(reports), 'phases': {},
+              'largest_matrix': {'rows': 0, 'columns': 0, 'cells': 0}}
+    for key in ('wall_seconds', 'cpu_seconds', 'alignments', 'filtered_alignments',
+                'matrices', 'cells'):
+        merged[key] = sum(report[key] for report in reports)
+    for report in reports:
+        for phase, values in report['phases'].items():
+            phase_values = merged['phases'].setdefault(
+                phase, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+            for key in phase_values:
+                phase_values[key] = phase_values[key] + values[key]
+        if report['largest_matrix']['cells'] > merged['largest_matrix']['cells']:
+            merged['largest_matrix'] = report['largest_matrix']
+    matrix_time = sum(merged['phases'][phase]['wall_seconds'] for phase in MATRIX_PHASES
+                      if phase in merged['phases'])
+    merged['cells_per_second'] = merged['cells'] / matrix_time if matrix_time > 0 else None
+    for key in ('peak_memory_bytes', 'peak_memory_workers_bytes'):
+        values = [report[key] for report in reports if report[key] is not None]
+        merged[key] = max(values) if values else None
+    with open(filename, 'w', encoding="utf-8") as outfile:
+        json.dump(merged, outfile, indent=2)
+        outfile.write('\n')
+
+def mergeShards(argv=None):
+    """
+    Join the output files of all shards of --shard into the files of a run without --shard.
+
+    The shards are checked to belong to one run and to cover all tasks, and their numbers of
+    alignments and lines are checked like in logStats().
+    """
+    options = merge_parser.parse_args(argv)
+    infos = readShardInfos(options.shards)
+    input_name = infos[0]['input']
+    suffix = '.gz' if infos[0]['options']['compress'] else ''
+
+    lines_per_alignment = 1 if infos[0]['options']['score_only'] else 3
+    mergeFiles(infos, 'alignments', timestamp + '_alignments_' + input_name + suffix,
+               lines_per_alignment)
+    if infos[0]['options']['verbose'] and not infos[0]['options']['score_only']:
+        mergeFiles(infos, 'verbose',
+                   timestamp + '_file_alignments_verbose_' + input_name + suffix, 3)
+    if options.metrics:
+        mergeMetrics(infos, options.metrics)
+
+def writeAlignment(record):
+    """Write an alignment record computed by traceback() into the output file(s)."""
+    global number_of_alignments
+    global number_of_lines_in_outfile
+
+    (name1, name2, score_alignment, alignmentlength, score_alignment_normalized,
+     AlignmentA, AlignmentB, number_of_zero_matches) = record
+
+    # build a string with names, score and length of alignment
+    first_line = name1 + ',' + name2 + ',' + score_alignment + ',' + str(alignmentlength) + ',' + str(score_alignment_normalized)
+
+    # write 3 lines in an outputfile (for every alignment), with --score-only only the first line
+    if AlignmentA is None:
+        alignment_writer.write(first_line + '\n')
+    else:
+        alignment_writer.write(first_line + '\n' + AlignmentB + '\n' + AlignmentA + '\n')
+
+    # write log info
+    if AlignmentA is None:
+        number_of_lines_in_outfile = number_of_lines_in_outfile+1
+    else:
+        number_of_lines_in_outfile = number_of_lines_in_outfile+3
+
+    # check if option -verbose is set and if so, create the second output file
+    if args.verbose and AlignmentA is not None:
+        timed('writeHumanreadableOutput',writeHumanreadableOutput,
+              name1,name2,score_alignment,alignmentlength,
+              AlignmentA.split(','),AlignmentB.split(','),number_of_zero_matches)
+
+    # global count for logging
+    number_of_alignments = number_of_alignments+1
+
+def writeResult(task,record):
+    """Write the record of a task from alignmentTasks() and store its scores with --matrix."""
+    writeAlignment(record)
+    if score_matrices is not None:
+        storeScores(task,record)
+
+def needleman_wunsch(subset):
+    """Function with all calls for NWA, except selfalignments. Return the alignment record."""
+
+    #input variables
+    name1 = subset[0].name
+    name2 = subset[1].name
+    value_list1 = subset[0].labels
+    value_list2 = subset[1].labels
+
+    # use the record of an earlier run from --cache
+    if alignment_cache is not None:
+        record = alignment_cache.lookup(name1,name2,value_list1,value_list2)
+        if record is not None:
+            return record
+
+    return computeAlignment(name1,name2,value_list1,value_list2)
+
+def needleman_wunschSelf(entry):
+    """Function with all selfalingment calls for NWA. Return the alignment record."""
+
+    #input variables
+    name1 = entry.name
+    name2 = name1
+    value_list1 = entry.labels
+    value_list2 = value_list1
+
+    # the self-alignment is the diagonal unless the scores favour gaps
+    record = selfAlignment(name1,value_list1)
+    if record is not None:
+        return record
+
+    return computeAlignment(name1,name2,value_list1,value_list2)
+
+def computeAlignment(name1,name2,value_list1,value_list2):
+    """Compute the alignment record of two sequences with the method selected by the options."""
+
+    sequence_length1 = len(value_list1)
+    sequence_length2 = len(value_list2)
+    if metrics is not None:
+        metrics.addMatrix(sequence_length1,sequence_length2)
+
+    # compute only the header fields with --score-only
+    if args.score_only:
+        return timed('scoreOnlyAlignment',scoreOnlyAlignment,name1,name2,value_list1,value_list2)
+
+    # align pairs close to the diagonal in a band of the score matrix
+    if useBandedAlignment(sequence_length1,sequence_length2):
+        record = timed('bandedAlignment',bandedAlignment,name1,name2,value_list1,value_list2)
+        if record is not None:
+            return record
+
+    # align large pairs without a full score matrix
+    if useLinearMemory(sequence_length1,sequence_length2):
+        return timed('linearMemoryAlignment',linearMemoryAlignment,
+                     name1,name2,value_list1,value_list2)
+
+    # build scorematrix for this alignment
+    matrix = timed('scorematrix',computeScorematrix,
+                   sequence_length1,sequence_length2,value_list1,value_list2)
+
+    # compute traceback for this alignment
+    return timed('traceback',traceback,name1,name2,value_list1,value_list2, matrix)
+
+def diagonalIsOptimal(codes):
+    """
+    Return True if the self-alignment of a sequence with these label codes is the pure diagonal.
+
+    This holds if every label scores at least two gaps against itself and no pair of labels
+    scores more than the mean of their self-scores. Then no alignment with gaps or shifted
+    labels can reach the score of the diagonal and scorematrix() chooses the diagonal pointer
+    in every diagonal cell. With --gapextension the larger gap penalty is used.
+    """
+    gap = PENALTY_GAP_OPENING
+    if args.gapextension:
+        gap = max(PENALTY_GAP_OPENING, PENALTY_GAP_EXTENSION)
+    distinct = list(dict.fromkeys(codes))
+    for code in distinct:
+        if score_table[code][code] < 2*gap:
+            return False
+    for code1, code2 in itertools.permutations(distinct, 2):
+        if 2*score_table[code1][code2] > score_table[code1][code1] + score_table[code2][code2]:
+            return False
+    return True
+
+def selfAlignment(name,value_list):
+    """
+    Return the record of the self-alignment of a sequence without a score matrix.
+
+    The self-alignment is the diagonal, so score, length and zero matches follow from
+    the labels. Returns None if the weights could make another alignment score higher.
+    """
+    codes = encodeLabels(value_list)
+    if has_empty_fid:
+        checkLabelPairs(value_list,value_list,codes,codes)
+    if not diagonalIsOptimal(codes):
+        if args.log:
+            logging.debug('The self-alignment of %s is computed with the score matrix, '
+                          'the scores could favour an alignment with gaps.', name)
+        return None
+
+    score = sum(score_table[code][code] for code in codes)
+    number_of_zero_matches = codes.count(0)
+    if args.score_only:
+        return alignmentRecord(name,name,str(score),len(codes),None,None,number_of_zero_matches)
+    AlignmentSelf = ','.join(value_list).strip(',')
+    return alignmentRecord(name,name,str(score),len(AlignmentSelf.split(',')),AlignmentSelf,
+                           AlignmentSelf,number_of_zero_matches)
+
+def alignmentTasks(list_with_all_sequences):
+    """
+    Yield the alignments to compute as index tuples in the order of the output file.
+
+    A tuple (i, j) is the alignment of sequence i with sequence j, a tuple (i,) the
+    self-alignment of sequence i. With --within-cluster or --cluster-pairs only the pairs of
+    the selected clusters are aligned (see setClusterPartners()), in the same order.
+    """
+    number_of_sequences = len(list_with_all_sequences)
+    if cluster_partners is None:
+        yield from itertools.combinations(range(number_of_sequences), 2)
+        if not args.noselfalignment:
+            for i in range(number_of_sequences):
+                yield (i,)
+        return
+
+    members = collections.defaultdict(list)
+    for index, entry in enumerate(list_with_all_sequences):
+        members[entry.clusID].append(index)
+    for i, entry in enumerate(list_with_all_sequences):
+        # the members of every partner cluster after sequence i, merged in the order of the input
+        partners = [members[clusID][bisect.bisect_right(members[clusID], i):]
+                    for clusID in cluster_partners.get(entry.clusID, ())]
+        for j in heapq.merge(*partners):
+            yield (i, j)
+    if not args.noselfalignment:
+        for i, entry in enumerate(list_with_all_sequences):
+            if entry.clusID in cluster_partners:
+                yield (i,)
+
+def readClusterPairs(filename):
+    """
+    Read the file of --cluster-pairs and return the list of ClusID pairs.
+
+    Every line holds two ClusIDs separated by whitespace, a comma or a semicolon. Empty lines
+    and lines starting with # are skipped.
+    """
+    cluster_pairs = []
+    try:
+        with open(filename, 'r', encoding="utf-8") as infile:
+            for line_number, line in enumerate(infile, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = re.split(r'[\s,;]+', line)
+                if len(fields) != 2 or not all(field.isdigit() for field in fields):
+                    print('Line', line_number, 'of the cluster pair file does not contain two ClusIDs.')
+                    if args.log:
+                        logging.critical('Line %s of %s does not contain two ClusIDs.',
+                                         str(line_number), filename)
+                    sys.exit(1)
+                cluster_pairs.append((int(fields[0]), int(fields[1])))
+    except IOError as e:
+        print('The cluster pair file cannot be read:', e)
+        if args.log:
+            logging.critical('Error in readClusterPairs(): %s', e)
+        sys.exit(1)
+    return cluster_pairs
+
+def setClusterPartners(list_with_all_sequences):
+    """Select the clusters to align with --within-cluster and --cluster-pairs."""
+    global cluster_partners
+
+    clusIDs = set(entry.clusID for entry in list_with_all_sequences)
+    cluster_partners = {}
+    if args.within_cluster:
+        for clusID in clusIDs:
+            cluster_partners[clusID] = {clusID}
+    if args.cluster_pairs:
+        for clusID1, clusID2 in readClusterPairs(args.cluster_pairs):
+            if clusID1 not in clusIDs or clusID2 not in clusIDs:
+                if args.log:
+                    logging.warning('The cluster pair %s,%s is not in the input file.',
+                                    str(clusID1), str(clusID2))
+                continue
+            cluster_partners.setdefault(clusID1, set()).add(clusID2)
+            cluster_partners.setdefault(clusID2, set()).add(clusID1)
+
+    if args.log:
+        pairs, selfalignments = expectedAlignments(list_with_all_sequences)
+        logging.info('%s of %s clusters are aligned, %s pairs instead of %s.',
+                     str(len(cluster_partners)), str(len(clusIDs)), str(pairs),
+                     str(math.comb(len(list_with_all_sequences),2)))
+
+def expectedAlignments(list_with_all_sequences):
+    """Return the number of pairs and self-alignments that alignmentTasks() yields."""
+    number_of_sequences = len(list_with_all_sequences)
+    if cluster_partners is None:
+        pairs = math.comb(number_of_sequences,2)
+        selfalignments = number_of_sequences
+    else:
+        sizes = collections.Counter(entry.clusID for entry in list_with_all_sequences)
+        pairs = 0
+        for clusID1, partners in cluster_partners.items():
+            for clusID2 in partners:
+                if clusID1 == clusID2:
+                    pairs = pairs + math.comb(sizes[clusID1],2)
+                elif clusID1 < clusID2:
+                    pairs = pairs + sizes[clusID1]*sizes[clusID2]
+        selfalignments = sum(sizes[clusID] for clusID in cluster_partners)
+    if args.noselfalignment:
+        selfalignments = 0
+    return pairs, selfalignments
+
+def architectureRepresentatives(list_with_all_sequences):
+    """
+    Return for every sequence the index of the first sequence with identical labels.
+
+    return value: tuple (list of representatives, number of sequences per representative)
+    """
+    first_index = {}
+    representatives = []
+    for index, entry in enumerate(list_with_all_sequences):
+        representatives.append(first_index.setdefault(tuple(entry.labels), index))
+    counts = collections.Counter(representatives)
+
+    if args.log:
+        logging.info('%s distinct domain architectures found in %s sequences.',
+                     str(len(first_index)), str(len(list_with_all_sequences)))
+    return representatives, counts
+
+def representativeTasks(list_with_all_sequences):
+    """
+    Yield every task of alignmentTasks() with the task of the representatives to compute.
+
+    Sequences with identical labels are aligned only once through the first of them
+    (see architectureRepresentatives()). Every entry is a tuple (task, representative task,
+    compute, keep, record): compute is False if the record of the representative task was
+    computed for an earlier task, keep is True if a later task needs the record again. The
+    record is None, it is set by previousResults().
+
+    The tasks of every representative task are counted first, so that the record of a
+    representative task is only kept until its last task and not until the end of the run.
+    """
+    if args.nodeduplication:
+        for task in alignmentTasks(list_with_all_sequences):
+            yield task, task, True, False, None
+        return
+
+    representatives, counts = architectureRepresentatives(list_with_all_sequences)
+    # remaining tasks of the representative tasks of sequences with duplicates
+    uses = collections.Counter()
+    for task in alignmentTasks(list_with_all_sequences):
+        representative_task = tuple(representatives[i] for i in task)
+        if any(counts[i] > 1 for i in representative_task):
+            uses[representative_task] += 1
+
+    computed = set()
+    for task in alignmentTasks(list_with_all_sequences):
+        representative_task = tuple(representatives[i] for i in task)
+        remaining = uses.get(representative_task)
+        if remaining is None:
+            yield task, representative_task, True, False, None
+            continue
+        compute = representative_task not in computed
+        if remaining > 1:
+            uses[representative_task] = remaining - 1
+            computed.add(representative_task)
+        else:
+            del uses[representative_task]
+            computed.discard(representative_task)
+        yield task, representative_task, compute, remaining > 1, None
+
+def providesRecord(entry):
+    """
+    Return True if taskRecord() stores the record of an entry for the later entries of its
+    representative task, that is if the entry is kept and computed or taken from --previous.
+    """
+    task, representative_task, compute, keep, previous = entry
+    return keep and (compute or previous is not None)
+
+def readPreviousRecords(filename):
+    """Yield the records of an alignment file of an earlier run as (first line, alignment lines)."""
+    if filename.endswith('.gz'):
+        infile = gzip.open(filename, 'rt', encoding="utf-8")
+    else:
+        infile = open(filename, 'r', encoding="utf-8")
+    with infile:
+        first_line = None
+        lines = []
+        for line in infile:
+            line = line.rstrip('\n')
+            # the first line of a record starts with the name of the first sequence
+            if line.startswith('>'):
+                if first_line is not None:
+                    yield first_line, lines
+                first_line = line
+                lines = []
+            else:
+                lines.append(line)
+        if first_line is not None:
+            yield first_line, lines
+
+def isKnownPair(first_line,known_names):
+    """Return True if both names in the first line of a record are names of the input."""
+    names = first_line.rsplit(',', 3)[0]
+    position = names.find(',>')
+    while position >= 0:
+        if names[:position] in known_names and names[position+1:] in known_names:
+            return True
+        position = names.find(',>', position+1)
+    return False
+
+def previousRecord(previous,task,list_with_all_sequences):
+    """
+    Return the record of an earlier alignment for a task, or None if it cannot be used.
+
+    The record is only used if its alignment contains the labels of both sequences,
+    records without alignment (--score-only) only in a run with --score-only.
+    """
+    first_line, lines = previous
+    entry1 = list_with_all_sequences[task[0]]
+    entry2 = list_with_all_sequences[task[-1]]
+    try:
+        names, score_alignment, alignmentlength, score_alignment_normalized = first_line.rsplit(',', 3)
+        alignmentlength = int(alignmentlength)
+        score_alignment_normalized = float(score_alignment_normalized)
+    except ValueError:
+        return None
+    if names != entry1.name + ',' + entry2.name:
+        return None
+
+    if len(lines) != 2:
+        if not args.score_only:
+            return None
+        return (entry1.name, entry2.name, score_alignment, alignmentlength,
+                score_alignment_normalized, None, None, 0)
+
+    AlignmentB, AlignmentA = lines
+    list_of_AlignmentA = AlignmentA.split(',')
+    list_of_AlignmentB = AlignmentB.split(',')
+    if ([label for label in list_of_AlignmentB if label != '-'] != entry1.labels
+            or [label for label in list_of_AlignmentA if label != '-'] != entry2.labels):
+        return None
+    number_of_zero_matches = sum(1 for label2, label1 in zip(list_of_AlignmentA, list_of_AlignmentB)
+                                 if label2 == '0' and label1 == '0')
+    if args.score_only:
+        AlignmentA = AlignmentB = None
+    return (entry1.name, entry2.name, score_alignment, alignmentlength, score_alignment_normalized,
+            AlignmentA, AlignmentB, number_of_zero_matches)
+
+def previousResults(entries,list_with_all_sequences):
+    """
+    Take the records of the entries from an alignment file of an earlier run (--previous).
+
+    The earlier records are read in the order of the file. As long as the accessions of the
+    earlier run keep their order in the input, their pairs and self-alignments come in the
+    same order as the entries, so the file is read only once. Records of accessions that are
+    not in the input anymore are skipped. An entry that takes an earlier record is not
+    computed and gets the record as its last item.
+    """
+    known_names = set(entry.name for entry in list_with_all_sequences)
+    previous_records = readPreviousRecords(args.previous)
+    current = next(previous_records, None)
+    reused = 0
+
+    for entry in entries:
+        task = entry[0]
+        # skip the records of accessions that are not in the input anymore
+        while current is not None and not isKnownPair(current[0],known_names):
+            current = next(previous_records, None)
+        names = list_with_all_sequences[task[0]].name + ',' + list_with_all_sequences[task[-1]].name
+        if current is not None and current[0].rsplit(',', 3)[0] == names:
+            record = previousRecord(current,task,list_with_all_sequences)
+            current = next(previous_records, None)
+            if record is not None:
+                entry = (task, entry[1], False, entry[3], record)
+                reused = reused + 1
+        yield entry
+
+    if args.log:
+        logging.info('%s alignments were taken from %s.', str(reused), args.previous)
+        if current is not None:
+            logging.warning('Not all alignments of %s were used, the order of the accessions '
+                            'has changed. The other alignments were computed.', args.previous)
+
+def alignmentEntries(list_with_all_sequences):
+    """
+    Return the entries of all alignments, with the records of --previous if it is set
+    and without the entries pruned by --min-score and --top-k.
+    """
+    entries = representativeTasks(list_with_all_sequences)
+    if args.previous:
+        entries = previousResults(entries,list_with_all_sequences)
+    if shard_range is not None:
+        entries = entryRange(entries,shard_range[0],shard_range[1])
+    if score_filter is not None:
+        entries = prunedEntries(entries)
+    if checkpoint is not None and checkpoint.done:
+        entries = entryRange(entries,checkpoint.done)
+    return entries
+
+def alignTask(task,list_with_all_sequences):
+    """Compute the alignment of one task from alignmentTasks() and return its record."""
+    if len(task) == 1:
+        return needleman_wunschSelf(list_with_all_sequences[task[0]])
+    return needleman_wunsch((list_with_all_sequences[task[0]], list_with_all_sequences[task[1]]))
+
+def taskRecord(entry,record,records,list_with_all_sequences):
+    """
+    Return the record of an entry from alignmentEntries() with the names of its task.
+
+    arguments:
+    entry -- tuple (task, representative task, compute, keep, earlier record or None)
+    record -- computed record, or None if the record in records is reused
+    records -- records of the representative tasks that are needed again
+    list_with_all_sequences -- list of Sequence
+    """
+    task, representative_task, compute, keep, previous = entry
+    if previous is not None:
+        record = previous
+    elif not compute:
+        record = records[representative_task]
+    # store the alignments of pairs in --cache
+    elif alignment_cache is not None and len(task) == 2:
+        alignment_cache.store(list_with_all_sequences[representative_task[0]].labels,
+                              list_with_all_sequences[representative_task[1]].labels,record)
+    if providesRecord(entry):
+        records[representative_task] = record
+    elif not keep:
+        # the last task of the representative task
+        records.pop(representative_task, None)
+    if representative_task != task:
+        record = ((list_with_all_sequences[task[0]].name, list_with_all_sequences[task[-1]].name)
+                  + record[2:])
+    return record
+
+def writeTaskResult(task,record):
+    """Write the record of a task, through the filter of --min-score and --top-k if it is set."""
+    if score_filter is not None:
+        score_filter.add(task,record)
+    else:
+        writeResult(task,record)
+
+def initWorker(worker_args,worker_weights,sequences):
+    """Set the options, the scores and the sequences in a worker process of --jobs."""
+    global args
+    global worker_sequences
+    global alignment_cache
+    global metrics
+
+    args = worker_args
+    setWeights(worker_weights)
+    worker_sequences = sequences
+
+    # the measurements of --metrics are sent to the main process with every chunk
+    if args.metrics:
+        metrics = RunMetrics()
+
+    # the cache is only read in a worker, with a connection of its own
+    if args.cache:
+        alignment_cache = AlignmentCache(args.cache, args.cachesize)
+
+def alignChunk(chunk):
+    """
+    Compute the alignments of a chunk of entries from alignmentEntries() in a worker process.
+
+    Every worker keeps its own matrices and counters. If an alignment stops the program,
+    the exit code is returned with the records computed before, so that the main process
+    writes the same output as a serial run and exits.
+
+    return value: tuple (list of (entry, record or None), exit code or None,
+                         measurements of --metrics or None)
+    """
+    results = []
+    exit_code = None
+    try:
+        for entry in chunk:
+            record = None
+            if entry[2]:
+                record = alignTask(entry[1],worker_sequences)
+            results.append((entry, record))
+    except SystemExit as e:
+        exit_code = e.code
+    if metrics is not None:
+        return results, exit_code, metrics.snapshot()
+    return results, exit_code, None
+
+def taskChunks(entries):
+    """Split the entries from alignmentEntries() into chunks with JOB_CHUNK_SIZE alignments."""
+    chunk = []
+    computed = 0
+    for entry in entries:
+        chunk.append(entry)
+        if entry[2]:
+            computed = computed + 1
+        if computed == JOB_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+            computed = 0
+    if chunk:
+        yield chunk
+
+def alignedRecordsParallel(list_with_all_sequences):
+    """Spread the alignments in chunks over --jobs worker processes and yield them in order."""
+    chunks = taskChunks(alignmentEntries(list_with_all_sequences))
+    records = {}
+
+    with multiprocessing.Pool(args.jobs, initializer=initWorker,
+                              initargs=(args, getWeights(), list_with_all_sequences)) as pool:
+        # imap returns the chunks in the order of the tasks
+        for results, exit_code, worker_metrics in pool.imap(alignChunk, chunks):
+            if worker_metrics is not None:
+                metrics.merge(worker_metrics)
+            for entry, record in results:
+                yield entry[0], taskRecord(entry,record,records,list_with_all_sequences)
+            if exit_code is not None:
+                pool.terminate()
+                sys.exit(exit_code)
+
+    if args.log:
+        logging.info('The alignments were computed with %s worker processes.', str(args.jobs))
+
+def alignedRecords(list_with_all_sequences):
+    """Yield the task and the record of every alignment in the order of the output file."""
+    if args.jobs > 1:
+        yield from alignedRecordsParallel(list_with_all_sequences)
+        return
+
+    records = {}
+    for entry in alignmentEntries(list_with_all_sequences):
+        record = None
+        if entry[2]:
+            record = alignTask(entry[1],list_with_all_sequences)
+        yield entry[0], taskRecord(entry,record,records,list_with_all_sequences)
+
+def alignAllPairs(list_with_all_sequences):
+    """Calls NWA for every possible pair of sequences."""
+
+    # if it is not explicitly stated that selfalignments should not be calculated,
+    # calculate selfalignments (appended to the entries of needleman_wunsch()).
+    if not args.noselfalignment and args.log:
+        logging.info('Compute self-alignments. '
+                     'For an output file without self-alignments, check program options.'
+                     )
+
+    for task, record in alignedRecords(list_with_all_sequences):
+        writeTaskResult(task,record)
+        if checkpoint is not None:
+            checkpoint.advance()
+
+def writeHumanreadableOutput(name1,name2,score_alignment,alignmentlength,
+list_of_AlignmentA,list_of_AlignmentB,number_of_zero_matches):
+    """Writes a more human readable output if -v is active and inserts padding into the alignment."""
+
+    # variables
+    entry_splitted=[]
+    transformedListA=[0]*alignmentlength
+    transformedListB=[0]*alignmentlength
     iterate_A = 0
     iterate_B = 0
 
@@ -701,8 +3483,7 @@ list_of_AlignmentA,list_of_AlignmentB):
     first_line = name1 + ',' + name2 + ',' + score_alignment + ',' + str(score_alignment_normalized)
 
     # write data in an output file
-    with open(timestamp+'_'+'file_alignments_verbose_'+ os.path.basename(args.filename), 'a', encoding="utf-8") as file_alignments:
-        file_alignments.write(first_line + '\n' + hAlignmentB + '\n' + hAlignmentA + '\n')
+    verbose_writer.write(first_line + '\n' + hAlignmentB + '\n' + hAlignmentA + '\n')
 
     if args.log:
         logging.debug('Additional file with better humanreadable output created.')
@@ -710,6 +3491,14 @@ list_of_AlignmentA,list_of_AlignmentB):
 def setScore():
     """Check if user provided a list with scores and set the score values accordingly."""
 
+    setWeights(args.score)
+
+    if args.log:
+        logging.info('The scores were set to %s by input.', str(args.score))
+
+def setWeights(weights):
+    """Set the 9 score values in the order of option -s."""
+
     # Scoring Matrix
     global WEIGHT_MATCH_F_GROUP
     global WEIGHT_MATCH_T_GROUP
@@ -724,22 +3513,28 @@ def setScore():
     global PENALTY_GAP_EXTENSION
 
     # set values
-    WEIGHT_MATCH_F_GROUP = args.score[0]
-    WEIGHT_MATCH_T_GROUP = args.score[1]
-    WEIGHT_MATCH_H_GROUP = args.score[2]
-    WEIGHT_MATCH_X_GROUP = args.score[3]
-    WEIGHT_MATCH_NO_FID = args.score[4]
-    WEIGHT_MISMATCH_FIDS = args.score[5]
-    WEIGHT_MISMATCH_NOFID_FID = args.score[6]
-    PENALTY_GAP_OPENING = args.score[7]
-    PENALTY_GAP_EXTENSION = args.score[8]
+    WEIGHT_MATCH_F_GROUP = weights[0]
+    WEIGHT_MATCH_T_GROUP = weights[1]
+    WEIGHT_MATCH_H_GROUP = weights[2]
+    WEIGHT_MATCH_X_GROUP = weights[3]
+    WEIGHT_MATCH_NO_FID = weights[4]
+    WEIGHT_MISMATCH_FIDS = weights[5]
+    WEIGHT_MISMATCH_NOFID_FID = weights[6]
+    PENALTY_GAP_OPENING = weights[7]
+    PENALTY_GAP_EXTENSION = weights[8]
 
-    if args.log:
-        logging.info('The scores were set to %s by input.', str(args.score))
+def getWeights():
+    """Return the 9 current score values in the order of option -s."""
+    return [WEIGHT_MATCH_F_GROUP, WEIGHT_MATCH_T_GROUP, WEIGHT_MATCH_H_GROUP,
+            WEIGHT_MATCH_X_GROUP, WEIGHT_MATCH_NO_FID, WEIGHT_MISMATCH_FIDS,
+            WEIGHT_MISMATCH_NOFID_FID, PENALTY_GAP_OPENING, PENALTY_GAP_EXTENSION]
 
 
 def checkInput():
-    """Check if given file exists, is a file and not empty."""
+    """Check if given file exists, is a file and not empty. The standard input is not checked."""
+
+    if args.filename == STDIN_FILENAME:
+        return
 
     # check if given file exists
     file_exists = os.path.exists(args.filename)
@@ -758,17 +3553,7 @@ def checkInput():
         logging.critical('The file is empty.')
     assert os.stat(args.filename).st_size > 0, "The file is empty."
 
-def deleteTempFiles():
-    """Delete intermediate file."""
-
-    if os.path.exists(timestamp+'_'+'formatted_input_'+ os.path.basename(args.filename)):
-        os.remove(timestamp+'_'+'formatted_input_'+ os.path.basename(args.filename))
-    else:
-        print('No file found to delete')
-        if args.log:
-            logging.error('The intermediate file could not be found.')
-
-def logStats():
+def logStats(list_with_all_sequences):
     """Logs some basic metrics."""
 
     logging.info('The number of lines read in the input file is %s.',
@@ -779,42 +3564,487 @@ def logStats():
                  )
     logging.info('Number of alignments processed is %s.'
                  ,str(number_of_alignments))
-    binomial = math.comb(number_of_lines_in_interfile,2)
-    logging.info('Number of alignments should be %s plus #sequences (= %s, for selfalignments)'
+    if number_of_filtered_alignments:
+        logging.info('%s alignments were left out by --min-score or --top-k.'
+                     ,str(number_of_filtered_alignments))
+    if shard_range is not None:
+        pairs, selfalignments = shard_range[2], shard_range[3]
+    else:
+        pairs, selfalignments = expectedAlignments(list_with_all_sequences)
+    logging.info('Number of alignments should be %s plus %s selfalignments'
                  ' = %s.'
-                 ,str(binomial)
-                 ,str(number_of_lines_in_interfile)
-                 ,str(binomial+number_of_lines_in_interfile)
-                 )
-    expected_lines_in_alignment = (number_of_alignments*2)+ number_of_alignments
-    logging.info('Number of lines in out file (= %s'
-                 ') should match #alignments times two + #alignments (= %s).'
-                 ,str(number_of_lines_in_outfile), str(expected_lines_in_alignment)
+                 ,str(pairs)
+                 ,str(selfalignments)
+                 ,str(pairs+selfalignments)
                  )
+    if args.score_only:
+        expected_lines_in_alignment = number_of_alignments
+        logging.info('Number of lines in out file (= %s'
+                     ') should match #alignments (= %s).'
+                     ,str(number_of_lines_in_outfile), str(expected_lines_in_alignment)
+                     )
+    else:
+        expected_lines_in_alignment = (number_of_alignments*2)+ number_of_alignments
+        logging.info('Number of lines in out file (= %s'
+                     ') should match #alignments times two + #alignments (= %s).'
+                     ,str(number_of_lines_in_outfile), str(expected_lines_in_alignment)
+                     )
     if number_of_lines_in_outfile != expected_lines_in_alignment:
         logging.warning('There are not the expected number of lines in the alignment file.')
-    if number_of_alignments != binomial+number_of_lines_in_interfile:
+    if number_of_alignments+number_of_filtered_alignments != pairs+selfalignments:
         logging.warning('The algorithm did not calculate the expected number of alignments.')
 
-def main():
-    """Main function which calls all functions"""
+# options of an Aligner that only apply to run(), which writes the output files like the
+# command line, and the options that select the alignments, which align() does not support
+RUN_OPTIONS = ('verbose', 'temp', 'buffersize', 'compress', 'cache', 'cachesize', 'previous',
+               'matrix', 'metrics', 'profile', 'checkpoint', 'checkpoint_interval', 'shard',
+               'stdout')
+SELECTION_OPTIONS = ('within_cluster', 'cluster_pairs', 'min_score', 'top_k')
+
+class AlignerError(Exception):
+    """Raised by Aligner if the input cannot be parsed or aligned."""
+
+class Aligner:
+    """
+    Align DomainMapper sequences from Python, without the command line.
+
+    An Aligner holds its options, its scores, the interned labels, the buffers of the score
+    matrix (see Workspace) and a counter of the alignments. The options are the command line options by their long name with
+    underscores, for example Aligner(gapextension=True, score=[8,4,2,1,0,-5,-1,-2,-1]).
+    The methods install the state of the Aligner in the module while they run, so one warm
+    process can serve many requests with one or more Aligners, but an Aligner is not
+    used by two threads at once. The options of RUN_OPTIONS only apply to run(), align()
+    and align_all() raise AlignerError if one of them is set.
+
+    run() and align_all() build the table of the interned labels for their input, align()
+    adds the labels of its pair to the table of the earlier calls. reset() drops the table
+    and the buffers, for example in a long running process that aligns many different pairs.
+
+    Example:
+        aligner = Aligner(noselfalignment=True)
+        sequences = aligner.parse('clusters.txt')
+        for alignment in aligner.align_all(sequences):
+            print(alignment.name1, alignment.name2, alignment.normalized_score)
+    """
+
+    def __init__(self,arguments=None,**options):
+        if arguments is None:
+            arguments = parser.parse_args([''])
+            # an Aligner aligns one input file, the command line takes several
+            arguments.filename = ''
+        else:
+            arguments = argparse.Namespace(**vars(arguments))
+        for key, value in options.items():
+            if not hasattr(arguments, key):
+                raise TypeError('Unknown option of Aligner: ' + key)
+            setattr(arguments, key, value)
+        self.args = arguments
+        if arguments.score:
+            self.weights = list(arguments.score)
+        else:
+            self.weights = list(DEFAULT_WEIGHTS)
+        # label_codes, label_list, score_table, has_empty_fid, score_table_array
+        self.labels = (None, None, None, False, None)
+        self.workspace = Workspace()
+        self.number_of_alignments = 0
+
+    def activate(self):
+        """Install the options, the scores and the interned labels in the module."""
+        global args
+        global label_codes
+        global label_list
+        global score_table
+        global has_empty_fid
+        global score_table_array
+        global workspace
+
+        args = self.args
+        workspace = self.workspace
+        setWeights(self.weights)
+        label_codes, label_list, score_table, has_empty_fid, score_table_array = self.labels
+
+    def deactivate(self):
+        """Keep the labels interned during a call for the next call."""
+        self.labels = (label_codes, label_list, score_table, has_empty_fid, score_table_array)
+
+    def reset(self):
+        """Drop the interned labels and the buffers of the score matrix of the earlier calls."""
+        self.labels = (None, None, None, False, None)
+        self.workspace = Workspace()
+
+    def call(self,function,*arguments):
+        """Run function with the state of the Aligner, errors raise AlignerError."""
+        self.activate()
+        try:
+            return function(*arguments)
+        except SystemExit as e:
+            raise AlignerError('The alignment stopped with exit code ' + str(e.code)
+                               + ', see the message above.') from None
+        finally:
+            self.deactivate()
+
+    def parse(self,path_or_stream):
+        """Parse a DomainMapper file (path or open stream) and return the list of Sequence."""
+        return self.call(parseSequences,path_or_stream)
+
+    def align(self,seq_a,seq_b):
+        """Align two sequences (Sequence or lists of labels) and return an Alignment."""
+        self.checkOptions('align()', RUN_OPTIONS + SELECTION_OPTIONS)
+        subset = (toSequence(seq_a,'a'), toSequence(seq_b,'b'))
+        record = self.call(needleman_wunsch,subset)
+        self.number_of_alignments = self.number_of_alignments + 1
+        return Alignment._make(recordFields(record))
+
+    def align_all(self,records):
+        """
+        Align all pairs of a list of sequences and return the list of Alignment.
+
+        The alignments are in the order of the output file of the command line, with the
+        self-alignments unless noselfalignment is set, selected by within_cluster and
+        cluster_pairs and filtered by min_score and top_k.
+        """
+        self.checkOptions('align_all()', RUN_OPTIONS)
+        list_with_all_sequences = [toSequence(entry,'sequence' + str(index))
+                                   for index, entry in enumerate(records)]
+        results = self.call(alignSequences,list_with_all_sequences)
+        self.number_of_alignments = self.number_of_alignments + len(results)
+        return results
+
+    def checkOptions(self,method,options):
+        """Raise AlignerError if one of options is not at its default, method ignores it."""
+        unsupported = [option for option in options
+                       if getattr(self.args, option) != parser.get_default(option)]
+        if unsupported:
+            raise AlignerError(method + ' does not support the options '
+                               + ', '.join(unsupported) + '.')
+
+    def run(self):
+        """Align the input file of the options and write the output files like the command line."""
+        self.activate()
+        try:
+            alignFile()
+        finally:
+            self.deactivate()
+
+def parseSequences(path_or_stream):
+    """Parse a DomainMapper file given as path or open stream and return the list of Sequence."""
+    if isinstance(path_or_stream, (str, os.PathLike)):
+        with open(path_or_stream, 'r', encoding="utf-8") as infile:
+            return list(parseInput(infile))
+    return list(parseInput(path_or_stream))
+
+def alignSequences(list_with_all_sequences):
+    """
+    Return the Alignment of every task in the order of the output file.
+
+    The clusters are selected with within_cluster and cluster_pairs and the alignments are
+    filtered with min_score and top_k as in the output file.
+    """
+    global score_filter
+
+    alignments = []
+    def keepAlignment(task,record):
+        alignments.append(Alignment._make(recordFields(record)))
+
+    # a new table with the labels of these sequences, like a run of the command line
+    internLabels(list_with_all_sequences)
+    try:
+        if args.within_cluster or args.cluster_pairs:
+            setClusterPartners(list_with_all_sequences)
+        if args.min_score is not None or args.top_k:
+            score_filter = ScoreFilter(list_with_all_sequences, args.min_score, args.top_k,
+                                       keepAlignment)
+        for task, record in alignedRecords(list_with_all_sequences):
+            if score_filter is not None:
+                score_filter.add(task,record)
+            else:
+                keepAlignment(task,record)
+        if score_filter is not None:
+            score_filter.close()
+    finally:
+        score_filter = None
+        closeSelection()
+    return alignments
+
+def toSequence(entry,accession):
+    """Return entry as Sequence, a list of labels gets the name '>0,accession'."""
+    if isinstance(entry, Sequence):
+        return entry
+    return Sequence('>0,' + accession, list(entry), 0, accession)
+
+def recordFields(record):
+    """Return the fields of an Alignment from an alignment record."""
+    (name1, name2, score_alignment, alignmentlength, score_alignment_normalized,
+     AlignmentA, AlignmentB, number_of_zero_matches) = record
+    return (name1, name2, int(score_alignment), alignmentlength, score_alignment_normalized,
+            AlignmentB, AlignmentA, number_of_zero_matches)
+
+def inputFiles(names):
+    """
+    Return the input files of the command line, with directories and glob patterns expanded.
+
+    A directory stands for the files in it, a pattern for the files that match it, both in
+    sorted order. A name that is neither is returned as it is, so that checkInput() reports it.
+    """
+    filenames = []
+    for name in names:
+        if os.path.isdir(name):
+            filenames.extend(sorted(os.path.join(name, entry) for entry in os.listdir(name)
+                                    if not entry.startswith('.')
+                                    and os.path.isfile(os.path.join(name, entry))))
+        elif not os.path.exists(name) and glob.has_magic(name):
+            filenames.extend(sorted(glob.glob(name)))
+        else:
+            filenames.append(name)
+    return filenames
+
+def batchArguments(filename):
+    """Return the options of a batch for one of its input files."""
+    arguments = argparse.Namespace(**vars(args))
+    arguments.filename = filename
+    # the files of a batch are spread over the worker processes, each aligns a file alone
+    arguments.jobs = 1
+    return arguments
+
+def initBatchWorker(batch_args,log_name):
+    """Create the Aligner of a worker process of a batch, which logs into the log of the batch."""
+    global args
+    global batch_aligner
+
+    args = batch_args
+    if not logging.getLogger().handlers:
+        setupLogging(log_name,'a')
+    batch_aligner = Aligner(args)
+
+def alignBatchFile(arguments):
+    """Align one input file of a batch with batch_aligner, return its name and exit code."""
+    if arguments.log:
+        logging.info('Align the file %s of the batch.', arguments.filename)
+    batch_aligner.args = arguments
+    try:
+        batch_aligner.run()
+    except SystemExit as e:
+        return arguments.filename, e.code
+    return arguments.filename, None
+
+def alignBatch(filenames):
+    """
+    Align every input file of a batch into its own output files in one process or one pool.
+
+    With --jobs N the files are spread over N worker processes that live for the whole batch,
+    the largest files first, so that many small files do not wait for one large file. Every
+    file is aligned by one worker, so a batch with one large file takes at least as long as
+    this file with one job. A file that stops with an error does not stop the other files.
+    """
+    global batch_aligner
+
+    names = collections.Counter(os.path.basename(filename) for filename in filenames)
+    duplicates = sorted(name for name, count in names.items() if count > 1)
+    if duplicates:
+        print('The output files of input files with the same name would overwrite each other: '
+              + ', '.join(duplicates))
+        if args.log:
+            logging.critical('Input files with the same name in a batch: %s', duplicates)
+        sys.exit(1)
+    if STDIN_FILENAME in filenames:
+        print('The standard input can only be read as the only input file.')
+        if args.log:
+            logging.critical('The standard input was given with %s input files.',
+                             str(len(filenames)))
+        sys.exit(1)
+    for option in ('previous', 'checkpoint', 'metrics', 'profile', 'stdout'):
+        if getattr(args, option):
+            print('The option --' + option + ' can only be used with one input file.')
+            if args.log:
+                logging.critical('The option --%s was used with %s input files.', option,
+                                 str(len(filenames)))
+            sys.exit(1)
+    if args.cache and args.jobs > 1:
+        print('The option --cache cannot be used with --jobs and more than one input file.')
+        if args.log:
+            logging.critical('The option --cache was used with --jobs and several input files.')
+        sys.exit(1)
+
+    if args.log:
+        logging.info('Align a batch of %s files.', str(len(filenames)))
+    if args.jobs > 1:
+        # the largest files first, the others fill the gaps
+        ordered = sorted(filenames,
+                         key=lambda filename: (os.path.getsize(filename)
+                                               if os.path.isfile(filename) else 0),
+                         reverse=True)
+        sizes = [os.path.getsize(filename) for filename in ordered if os.path.isfile(filename)]
+        if (args.log and len(sizes) > 1 and sizes[0] >= 2 * sizes[1]
+                and sizes[0] * args.jobs > sum(sizes)):
+            logging.warning('The file %s is large compared to the batch and is aligned by one '
+                            'worker. Align it alone with --jobs to spread its alignments over '
+                            'the worker processes.', ordered[0])
+        with multiprocessing.Pool(min(args.jobs, len(filenames)), initializer=initBatchWorker,
+                                  initargs=(args, 'batch')) as pool:
+            results = list(pool.imap_unordered(alignBatchFile,
+                                               (batchArguments(filename) for filename in ordered)))
+    else:
+        batch_aligner = Aligner(args)
+        results = [alignBatchFile(batchArguments(filename)) for filename in filenames]
+        batch_aligner = None
+
+    failed = sorted(filename for filename, exit_code in results if exit_code)
+    if failed:
+        print('The alignment of ' + str(len(failed)) + ' of ' + str(len(filenames))
+              + ' files failed: ' + ', '.join(failed))
+        if args.log:
+            logging.critical('The alignment of %s of %s files failed: %s', str(len(failed)),
+                             str(len(filenames)), failed)
+        sys.exit(1)
+    if args.log:
+        logging.info('The batch of %s files is aligned.', str(len(filenames)))
+
+def resetCounters():
+    """Set the counters of logStats() to zero before an input file is aligned."""
+    global number_of_alignments
+    global number_of_lines_in_infile
+    global number_of_lines_in_interfile
+    global number_of_lines_in_outfile
+    global number_of_filtered_alignments
+
+    number_of_alignments = 0
+    number_of_lines_in_infile = 0
+    number_of_lines_in_interfile = 0
+    number_of_lines_in_outfile = 0
+    number_of_filtered_alignments = 0
+
+def alignFile():
+    """
+    Align the input file of args and write the output files.
+
+    With --stdout the alignments are written to the standard output and the messages to the
+    standard error.
+    """
+    resetCounters()
+    output_stream = sys.stdout
+    if args.stdout:
+        sys.stdout = sys.stderr
     try:
         # check if input file is okay
         checkInput()
 
+        # check if the optional modules for the selected engine are available
+        if args.engine == 'numpy' and np is None:
+            print('The numpy engine requires the module numpy. Please install numpy or '
+                  'use --engine python.')
+            if args.log:
+                logging.critical('The numpy engine was selected, but numpy is not installed.')
+            sys.exit(1)
+        if args.matrix and np is None:
+            print('The option --matrix requires the module numpy. Please install numpy.')
+            if args.log:
+                logging.critical('The option --matrix was selected, but numpy is not installed.')
+            sys.exit(1)
+        if args.previous and not os.path.isfile(args.previous):
+            print('The alignment file given with --previous does not exist.')
+            if args.log:
+                logging.critical('The alignment file %s given with --previous does not exist.',
+                                 args.previous)
+            sys.exit(1)
+        if args.top_k is not None and args.top_k < 1:
+            print('The number of partners for --top-k must be at least 1.')
+            if args.log:
+                logging.critical('The number of partners for --top-k must be at least 1, '
+                                 '%s was given.', str(args.top_k))
+            sys.exit(1)
+        if args.jobs < 1:
+            print('The number of jobs must be at least 1.')
+            if args.log:
+                logging.critical('The number of jobs must be at least 1, %s was given.',
+                                 str(args.jobs))
+            sys.exit(1)
+        if args.checkpoint and args.top_k:
+            print('The option --checkpoint cannot be combined with --top-k, which writes the '
+                  'alignments at the end of the run.')
+            if args.log:
+                logging.critical('The options --checkpoint and --top-k were combined.')
+            sys.exit(1)
+        if args.shard and shardNumbers(args.shard) is None:
+            print('The shard must be given as K/N with 1 <= K <= N, like --shard 2/8.')
+            if args.log:
+                logging.critical('The shard %s is not valid.', args.shard)
+            sys.exit(1)
+        if args.shard and (args.top_k or args.matrix):
+            print('The option --shard cannot be combined with --top-k or --matrix, which need '
+                  'the alignments of all pairs.')
+            if args.log:
+                logging.critical('The option --shard was combined with --top-k or --matrix.')
+            sys.exit(1)
+        if args.filename == STDIN_FILENAME and (args.checkpoint or args.shard):
+            print('The options --checkpoint and --shard need an input file, they cannot read '
+                  'the standard input.')
+            if args.log:
+                logging.critical('The option --checkpoint or --shard was used with the '
+                                 'standard input.')
+            sys.exit(1)
+        if args.stdout and (args.checkpoint or args.shard or args.compress):
+            print('The option --stdout cannot be combined with --checkpoint, --shard or '
+                  '--compress, which need the alignment file. Pipe the output into gzip '
+                  'to compress it.')
+            if args.log:
+                logging.critical('The option --stdout was combined with --checkpoint, --shard '
+                                 'or --compress.')
+            sys.exit(1)
+        if args.checkpoint_interval < 0:
+            print('The interval of --checkpoint must not be negative.')
+            if args.log:
+                logging.critical('The interval of --checkpoint must not be negative, %s was '
+                                 'given.', str(args.checkpoint_interval))
+            sys.exit(1)
+        if args.score_only and args.verbose and args.log:
+            logging.warning('No human-readable output is written with --score-only.')
+        if args.banded and args.gapextension and args.log:
+            logging.warning('The banded alignment supports only linear gap penalties. '
+                            'The full score matrix is used with --gapextension.')
+        if args.engine == 'runlength' and args.gapextension and args.log:
+            logging.warning('The run-length engine supports only linear gap penalties. '
+                            'The python engine is used with --gapextension.')
+
+        # measure the phases of the run with --metrics
+        if args.metrics:
+            openMetrics()
+
+        # continue a stopped run with the timestamp of its output files
+        if args.checkpoint:
+            openCheckpoint()
+
         # convert the given input in proper input for needleman wunsch algorithm
-        convertInput()
+        list_with_all_sequences = timed('convertInput',convertInput)
 
         # check if alternative scores are provided and if yes, store them
         if args.score:
             setScore()
 
-        # read input data and align all sequences
-        alignAllPairs(readInput())
+        # select the clusters to align
+        if args.within_cluster or args.cluster_pairs:
+            setClusterPartners(list_with_all_sequences)
 
-        # check if option -temp is set and if so, delete file with transformed input
-        if not args.temp:
-            deleteTempFiles()
+        # select the tasks of this shard
+        if args.shard:
+            setShardRange(list_with_all_sequences)
+
+        # intern the labels and align all sequences
+        internLabels(list_with_all_sequences)
+        if args.cache:
+            openCache()
+        openOutputFiles(list_with_all_sequences,output_stream)
+        if args.min_score is not None or args.top_k:
+            openScoreFilter(list_with_all_sequences)
+        if args.profile:
+            profiledAlignAllPairs(list_with_all_sequences)
+        else:
+            timed('alignAllPairs',alignAllPairs,list_with_all_sequences)
+        closeScoreFilter()
+        closeOutputFiles()
+        closeCache()
+        closeCheckpoint()
+        if args.shard:
+            writeShardInfo(list_with_all_sequences)
 
         # log info with gapextension value
         if args.log:
@@ -829,12 +4059,52 @@ def main():
 
         # write log with basic stats
         if args.log:
-            logStats()
+            logStats(list_with_all_sequences)
+    except BrokenPipeError:
+        # the reader of --stdout stopped early, like head, the rest goes to the null device
+        print('The standard output was closed before all alignments were written.')
+        if args.log:
+            logging.critical('The standard output was closed before all alignments were '
+                             'written.')
+        try:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), output_stream.fileno())
+        except (AttributeError, OSError, ValueError):
+            pass
+        sys.exit(1)
     except Exception as e:
         print('An error occured in main():', e)
         if args.log:
             logging.critical('An error occured in main(): %s.',e)
         sys.exit(1)
+    finally:
+        # keep the alignments computed before an error
+        closeOutputFiles()
+        closeCache()
+        closeMetrics()
+        closeSelection()
+        sys.stdout = output_stream
+
+def main(argv=None):
+    """Main function which calls all functions"""
+    global args
+
+    # join the shards of --shard with the merge command
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'merge':
+        mergeShards(argv[1:])
+        return
+
+    args = parseArguments(argv)
+    filenames = inputFiles(args.filename)
+    if len(filenames) > 1:
+        setupLogging('batch')
+        alignBatch(filenames)
+        return
+    args.filename = filenames[0] if filenames else args.filename[0]
+    setupLogging()
+    Aligner(args).run()
 
 # call main function to start program
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Helpers of the tests of dNWA.py.
+
+The tests run dNWA.py as a program in a temporary directory, because a run keeps its state in
+the module, and compare the output files with the result files in example_data.
+"""
+
+# import modules
+import glob
+import gzip
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DNWA = os.path.join(ROOT, 'dNWA.py')
+EXAMPLE_DATA = os.path.join(ROOT, 'example_data')
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+def exampleInput(folder,number):
+    """Return the path of the input file test_<number>_*.txt of an example_data folder."""
+    paths = glob.glob(os.path.join(EXAMPLE_DATA, folder, 'test_' + number + '_*.txt'))
+    assert len(paths) == 1, paths
+    return paths[0]
+
+def exampleResult(folder,number):
+    """Return the text of result_test_<number>.txt of an example_data folder, with \\n lines."""
+    with open(os.path.join(EXAMPLE_DATA, folder, 'result_test_' + number + '.txt'), 'r',
+              encoding="utf-8") as infile:
+        return infile.read()
+
+def firstLines(text):
+    """Return the first line of every alignment of an alignment file, the --score-only output."""
+    lines = text.splitlines(True)
+    return ''.join(lines[0::3])
+
+def records(text):
+    """Return the alignments of an alignment file as a list of their three lines."""
+    lines = text.splitlines(True)
+    return [''.join(lines[index:index+3]) for index in range(0, len(lines), 3)]
+
+def outputFile(directory,prefix):
+    """Return the text of the output file <timestamp>_<prefix>* in directory, also as .gz."""
+    paths = [path for path in glob.glob(os.path.join(str(directory), '*_' + prefix + '*'))
+             if os.path.basename(path).split('_', 1)[1].startswith(prefix)]
+    assert len(paths) == 1, paths
+    if paths[0].endswith('.gz'):
+        with gzip.open(paths[0], 'rt', encoding="utf-8") as infile:
+            return infile.read()
+    with open(paths[0], 'r', encoding="utf-8") as infile:
+        return infile.read()
+
+@pytest.fixture
+def run_dnwa(tmp_path):
+    """
+    Return a function that runs dNWA.py with arguments in tmp_path and returns the
+    subprocess.CompletedProcess, with stdin as standard input.
+    """
+    def run(*arguments,stdin=None,cwd=None):
+        return subprocess.run([sys.executable, DNWA] + [str(argument) for argument in arguments],
+                              cwd=str(cwd or tmp_path), input=stdin, capture_output=True,
+                              text=True, timeout=600)
+    return run
@@ -0,0 +1,69 @@
+"""Align the example_data inputs with the Aligner class of dNWA.py."""
+
+# import modules
+import pytest
+
+import dNWA
+from conftest import exampleInput, exampleResult, firstLines, outputFile
+
+def firstLine(alignment):
+    """Return the first line of an Alignment in the alignment file."""
+    return ','.join([alignment.name1, alignment.name2, str(alignment.score), str(alignment.length),
+                     str(alignment.normalized_score)]) + '\n'
+
+def test_align_all():
+    aligner = dNWA.Aligner()
+    alignments = aligner.align_all(aligner.parse(exampleInput('implementation_tests', '16')))
+    assert ''.join(firstLine(alignment) for alignment in alignments) == firstLines(
+        exampleResult('implementation_tests', '16'))
+
+@pytest.mark.parametrize('options,arguments', [
+    ({'min_score': 2.5}, ['--min-score', '2.5']),
+    ({'top_k': 1}, ['--top-k', '1']),
+    ({'within_cluster': True}, ['--within-cluster']),
+    ({'within_cluster': True, 'min_score': 1.0, 'jobs': 2},
+     ['--within-cluster', '--min-score', '1.0']),
+])
+def test_selection_options(run_dnwa,tmp_path,options,arguments):
+    path = exampleInput('implementation_tests', '08')
+    aligner = dNWA.Aligner(**options)
+    alignments = aligner.align_all(aligner.parse(path))
+    completed = run_dnwa(path, *arguments)
+    assert completed.returncode == 0, completed.stdout
+    expected = firstLines(outputFile(tmp_path, 'alignments_'))
+    assert 0 < len(alignments) < 36
+    assert ''.join(firstLine(alignment) for alignment in alignments) == expected
+
+@pytest.mark.parametrize('option,value', [('matrix', True), ('shard', '1/2'),
+                                          ('checkpoint', 'checkpoint.json'), ('cache', 'cache'),
+                                          ('stdout', True)])
+def test_run_options_are_rejected(option,value):
+    aligner = dNWA.Aligner(**{option: value})
+    sequences = aligner.parse(exampleInput('implementation_tests', '09'))
+    with pytest.raises(dNWA.AlignerError, match=option):
+        aligner.align_all(sequences)
+    with pytest.raises(dNWA.AlignerError, match=option):
+        aligner.align(sequences[0], sequences[1])
+
+def test_align_rejects_selection_options():
+    aligner = dNWA.Aligner(min_score=1.0)
+    sequences = aligner.parse(exampleInput('implementation_tests', '09'))
+    with pytest.raises(dNWA.AlignerError, match='min_score'):
+        aligner.align(sequences[0], sequences[1])
+
+def test_label_table_of_align_all():
+    aligner = dNWA.Aligner()
+    first = aligner.parse(exampleInput('implementation_tests', '16'))
+    second = aligner.parse(exampleInput('implementation_tests', '09'))
+    aligner.align_all(first)
+    alignments = aligner.align_all(second)
+    # only the labels of the last input are interned
+    labels = set(label for sequence in second for label in sequence.labels)
+    assert set(aligner.labels[1]) == labels | {'0'}
+    assert alignments == dNWA.Aligner().align_all(second)
+
+    aligner.align(first[0], first[1])
+    assert len(aligner.labels[1]) > len(labels | {'0'})
+    aligner.reset()
+    assert aligner.labels[1] is None
+    assert aligner.align(second[0], second[1]) == alignments[0]
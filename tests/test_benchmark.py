@@ -0,0 +1,23 @@
+"""Run the benchmark of dNWA.py on a small synthetic input."""
+
+# import modules
+import json
+import os
+import sys
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import benchmark
+
+def test_repeated_runs_count_alignments(tmp_path):
+    output = tmp_path / 'results.json'
+    benchmark.main(['--sizes', '2x4x60', '--repeat', '3', '--pairs', '3', '--no-memory',
+                    '--output', str(output)])
+    with open(str(output), 'r', encoding="utf-8") as infile:
+        result = json.load(infile)['results'][0]
+    # 8 sequences: 28 pairs and 8 self-alignments in every repetition
+    assert result['sequences'] == 8
+    assert result['main']['alignments'] == 36
+    assert result['main']['pairs_per_second'] > 0
@@ -0,0 +1,28 @@
+"""Check the bound of --cachesize on the alignment cache of dNWA.py."""
+
+# import modules
+import dNWA
+
+def test_cache_stays_within_its_size(tmp_path):
+    aligner = dNWA.Aligner()
+    aligner.activate()
+    try:
+        cache = dNWA.AlignmentCache(str(tmp_path / 'cache.sqlite'), 3)
+        labels = [['1.1.1.%d' % number] for number in range(8)]
+        for index, value_list in enumerate(labels):
+            record = dNWA.needleman_wunsch((dNWA.toSequence(value_list,'a'),
+                                            dNWA.toSequence(labels[0],'b')))
+            cache.store(value_list,labels[0],record)
+            # storing a cached alignment again only marks it as used
+            cache.store(labels[0],labels[0],record)
+            count = cache.connection.execute('SELECT COUNT(*) FROM alignments').fetchone()[0]
+            assert count == min(index + 1, 3)
+        cache.close()
+
+        cache = dNWA.AlignmentCache(str(tmp_path / 'cache.sqlite'), 3)
+        assert cache.lookup('a','b',labels[0],labels[0]) is not None
+        assert cache.lookup('a','b',labels[7],labels[0]) is not None
+        assert cache.lookup('a','b',labels[5],labels[0]) is None
+        cache.close()
+    finally:
+        aligner.deactivate()
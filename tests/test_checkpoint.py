@@ -0,0 +1,72 @@
+"""Resume runs of dNWA.py with --checkpoint that were stopped after some alignments."""
+
+# import modules
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT, exampleInput, exampleResult, outputFile
+
+# stops the run given by the arguments when the alignment with number sys.argv[1] is written,
+# with a checkpoint after every alignment before it
+STOPPING_RUN = '''
+import sys
+sys.path.insert(0, %r)
+import dNWA
+
+stop = int(sys.argv[1])
+write = dNWA.writeTaskResult
+written = []
+
+def stoppingWrite(task,record):
+    if len(written) + 1 == stop:
+        raise KeyboardInterrupt
+    written.append(task)
+    write(task,record)
+
+dNWA.writeTaskResult = stoppingWrite
+try:
+    dNWA.main(sys.argv[2:] + ['--checkpoint-interval', '0'])
+except KeyboardInterrupt:
+    sys.exit(3)
+''' % ROOT
+
+# A and C have the same domain labels, so C is aligned through the representative A
+OLD_INPUT = ('>ClusID 0; #Accessions 2; Structural_annotation L\n'
+             'A (0,0,START) (0,5,1.1.1.1) (8,12,2.1.1.1) (12,12,END)\n'
+             'B (0,0,START) (2,6,1.1.1.1) (6,10,3.1.1.1) (10,10,END)\n')
+NEW_INPUT = OLD_INPUT.replace('#Accessions 2', '#Accessions 3') + (
+    'C (0,0,START) (0,5,1.1.1.1) (8,12,2.1.1.1) (12,12,END)\n')
+
+def stopAndResume(run_dnwa,directory,stop,*arguments):
+    """Stop a run with --checkpoint at alignment stop, resume it and return the output."""
+    arguments = [str(argument) for argument in arguments] + ['--checkpoint', 'checkpoint.json']
+    stopped = subprocess.run([sys.executable, '-c', STOPPING_RUN, str(stop)] + arguments,
+                             cwd=str(directory), capture_output=True, text=True, timeout=600)
+    assert stopped.returncode == 3, stopped.stdout + stopped.stderr
+    assert os.path.exists(os.path.join(str(directory), 'checkpoint.json'))
+    resumed = run_dnwa(*arguments, cwd=directory)
+    assert resumed.returncode == 0, resumed.stdout
+    assert not os.path.exists(os.path.join(str(directory), 'checkpoint.json'))
+    return outputFile(directory, 'alignments_')
+
+@pytest.mark.parametrize('stop', [1, 7, 15])
+def test_resume(run_dnwa,tmp_path,stop):
+    output = stopAndResume(run_dnwa, tmp_path, stop, exampleInput('implementation_tests', '16'))
+    assert output == exampleResult('implementation_tests', '16')
+
+@pytest.mark.parametrize('stop', range(1, 7))
+def test_resume_previous_with_duplicates(run_dnwa,tmp_path,stop):
+    (tmp_path / 'old.txt').write_text(OLD_INPUT, encoding="utf-8")
+    (tmp_path / 'new.txt').write_text(NEW_INPUT, encoding="utf-8")
+    for run in ('old', 'full'):
+        (tmp_path / run).mkdir()
+    assert run_dnwa(tmp_path / 'old.txt', cwd=tmp_path / 'old').returncode == 0
+    previous = tmp_path / 'previous.txt'
+    previous.write_text(outputFile(tmp_path / 'old', 'alignments_'), encoding="utf-8")
+    assert run_dnwa(tmp_path / 'new.txt', cwd=tmp_path / 'full').returncode == 0
+
+    output = stopAndResume(run_dnwa, tmp_path, stop, 'new.txt', '--previous', previous)
+    assert output == outputFile(tmp_path / 'full', 'alignments_')
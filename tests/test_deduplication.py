@@ -0,0 +1,25 @@
+"""Check which records of the representative tasks of dNWA.py are kept for later tasks."""
+
+# import modules
+import collections
+
+import dNWA
+from conftest import exampleInput
+
+def test_records_are_kept_until_the_last_task():
+    aligner = dNWA.Aligner()
+    sequences = aligner.parse(exampleInput('implementation_tests', '08'))
+    aligner.activate()
+    try:
+        entries = list(dNWA.representativeTasks(sequences))
+    finally:
+        aligner.deactivate()
+
+    tasks = collections.defaultdict(list)
+    for task, representative_task, compute, keep, previous in entries:
+        tasks[representative_task].append((compute, keep))
+    assert any(len(uses) > 1 for uses in tasks.values())
+    for uses in tasks.values():
+        # the first task computes the record, every task but the last keeps it
+        assert [compute for compute, keep in uses] == [True] + [False]*(len(uses)-1)
+        assert [keep for compute, keep in uses] == [True]*(len(uses)-1) + [False]
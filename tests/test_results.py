@@ -0,0 +1,163 @@
+"""Compare the alignments of the engines and modes of dNWA.py with the results in example_data."""
+
+# import modules
+import os
+
+import pytest
+
+from conftest import (HAS_NUMPY, exampleInput, exampleResult, firstLines, outputFile,
+                      records)
+
+# inputs whose result file is the alignment file of a run with the default options
+RESULT_TESTS = ([('implementation_tests', number) for number in
+                 ('03', '08', '09', '10', '11', '12', '13', '15', '16', '17', '18', '19', '21')]
+                + [('scoring_tests', '07'), ('scoring_tests', '12')])
+# inputs whose result file is also the alignment file with -g
+GAP_EXTENSION_TESTS = ([('implementation_tests', number) for number in
+                        ('03', '09', '10', '11', '12', '13', '15')]
+                       + [('scoring_tests', '07'), ('scoring_tests', '12')])
+# inputs that stop with an error, with the message of the result file if it is still printed
+ERROR_TESTS = [('implementation_tests', '01', False), ('implementation_tests', '02', False),
+               ('implementation_tests', '04', False), ('implementation_tests', '06', True),
+               ('implementation_tests', '07', True), ('implementation_tests', '14', True),
+               ('implementation_tests', '20', True), ('scoring_tests', '08', True),
+               ('scoring_tests', '10', True)]
+
+NUMPY = pytest.mark.skipif(not HAS_NUMPY, reason='numpy is not installed')
+MODES = [
+    pytest.param([], id='python'),
+    pytest.param(['--engine', 'runlength'], id='runlength'),
+    pytest.param(['--engine', 'numpy'], id='numpy', marks=NUMPY),
+    pytest.param(['--banded'], id='banded'),
+    pytest.param(['--linearmemory'], id='linearmemory'),
+    pytest.param(['--nodeduplication'], id='nodeduplication'),
+    pytest.param(['--jobs', '2'], id='jobs'),
+    pytest.param(['--buffersize', '1'], id='buffersize'),
+]
+
+@pytest.mark.parametrize('options', MODES)
+@pytest.mark.parametrize('folder,number', RESULT_TESTS)
+def test_modes(run_dnwa,tmp_path,folder,number,options):
+    completed = run_dnwa(exampleInput(folder, number), *options)
+    assert completed.returncode == 0, completed.stdout
+    assert outputFile(tmp_path, 'alignments_') == exampleResult(folder, number)
+
+@pytest.mark.parametrize('options', [pytest.param([], id='python'),
+                                     pytest.param(['--engine', 'numpy'], id='numpy',
+                                                  marks=NUMPY)])
+@pytest.mark.parametrize('folder,number', GAP_EXTENSION_TESTS)
+def test_gap_extension(run_dnwa,tmp_path,folder,number,options):
+    completed = run_dnwa(exampleInput(folder, number), '-g', *options)
+    assert completed.returncode == 0, completed.stdout
+    assert outputFile(tmp_path, 'alignments_') == exampleResult(folder, number)
+
+def test_long_sequences_runlength(run_dnwa,tmp_path):
+    # the python engine needs about half a minute for the long sequences of test 05
+    completed = run_dnwa(exampleInput('implementation_tests', '05'), '--engine', 'runlength')
+    assert completed.returncode == 0, completed.stdout
+    assert outputFile(tmp_path, 'alignments_') == exampleResult('implementation_tests', '05')
+
+@pytest.mark.parametrize('folder,number', RESULT_TESTS)
+def test_score_only(run_dnwa,tmp_path,folder,number):
+    completed = run_dnwa(exampleInput(folder, number), '--score-only')
+    assert completed.returncode == 0, completed.stdout
+    assert outputFile(tmp_path, 'alignments_') == firstLines(exampleResult(folder, number))
+
+def test_temp_file(run_dnwa,tmp_path):
+    completed = run_dnwa(exampleInput('implementation_tests', '16'), '-t')
+    assert completed.returncode == 0, completed.stdout
+    assert outputFile(tmp_path, 'alignments_') == exampleResult('implementation_tests', '16')
+    assert len(outputFile(tmp_path, 'formatted_input_').splitlines()) == 10
+
+def test_verbose_and_compress(run_dnwa,tmp_path):
+    completed = run_dnwa(exampleInput('implementation_tests', '16'), '--compress', '-v')
+    assert completed.returncode == 0, completed.stdout
+    assert outputFile(tmp_path, 'alignments_') == exampleResult('implementation_tests', '16')
+    assert outputFile(tmp_path, 'file_alignments_verbose_')
+
+def test_stdin_and_stdout(run_dnwa,tmp_path):
+    with open(exampleInput('implementation_tests', '08'), 'r', encoding="utf-8") as infile:
+        text = infile.read()
+    completed = run_dnwa('-', '--stdout', stdin=text)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout == exampleResult('implementation_tests', '08')
+    assert os.listdir(str(tmp_path)) == []
+
+def test_stdin_output_names(run_dnwa,tmp_path):
+    with open(exampleInput('implementation_tests', '16'), 'r', encoding="utf-8") as infile:
+        completed = run_dnwa('-', stdin=infile.read())
+    assert completed.returncode == 0, completed.stdout
+    assert outputFile(tmp_path, 'alignments_stdin') == exampleResult('implementation_tests', '16')
+
+def test_cache(run_dnwa,tmp_path):
+    cache = tmp_path / 'cache' / 'alignments.sqlite'
+    cache.parent.mkdir()
+    for run in ('first', 'second'):
+        directory = tmp_path / run
+        directory.mkdir()
+        completed = run_dnwa(exampleInput('implementation_tests', '17'), '--cache', cache,
+                             cwd=directory)
+        assert completed.returncode == 0, completed.stdout
+        assert outputFile(directory, 'alignments_') == exampleResult('implementation_tests', '17')
+    assert cache.exists()
+
+def test_previous(run_dnwa,tmp_path):
+    previous = os.path.join(os.path.dirname(exampleInput('implementation_tests', '18')),
+                            'result_test_18.txt')
+    completed = run_dnwa(exampleInput('implementation_tests', '18'), '--previous', previous,
+                         '-l')
+    assert completed.returncode == 0, completed.stdout
+    assert outputFile(tmp_path, 'alignments_') == exampleResult('implementation_tests', '18')
+    assert '15 alignments were taken from' in outputFile(tmp_path, 'basic_log_')
+
+def test_min_score(run_dnwa,tmp_path):
+    completed = run_dnwa(exampleInput('implementation_tests', '08'), '--min-score', '2.5')
+    assert completed.returncode == 0, completed.stdout
+    expected = [record for record in records(exampleResult('implementation_tests', '08'))
+                if float(record.split('\n', 1)[0].rsplit(',', 1)[1]) >= 2.5]
+    assert 0 < len(expected) < len(records(exampleResult('implementation_tests', '08')))
+    assert records(outputFile(tmp_path, 'alignments_')) == expected
+
+def test_within_cluster(run_dnwa,tmp_path):
+    completed = run_dnwa(exampleInput('implementation_tests', '08'), '--within-cluster')
+    assert completed.returncode == 0, completed.stdout
+    expected = []
+    for record in records(exampleResult('implementation_tests', '08')):
+        names = record.split('\n', 1)[0].split(',')
+        if names[0] == names[2]:
+            expected.append(record)
+    assert records(outputFile(tmp_path, 'alignments_')) == expected
+
+def test_batch(run_dnwa,tmp_path):
+    inputs = [exampleInput(folder, number) for folder, number in RESULT_TESTS[:6]]
+    completed = run_dnwa(*inputs, '--jobs', '2')
+    assert completed.returncode == 0, completed.stdout
+    for (folder, number), path in zip(RESULT_TESTS, inputs):
+        assert (outputFile(tmp_path, 'alignments_' + os.path.basename(path))
+                == exampleResult(folder, number))
+
+@NUMPY
+def test_batch_numpy_with_other_labels(run_dnwa,tmp_path):
+    # both files have two labels, with other scores in the second file
+    inputs = {'first.txt': ('1.1.1.1', '2.1.1.1'), 'second.txt': ('3.1.1.1', '3.1.1.2')}
+    for name, labels in inputs.items():
+        (tmp_path / name).write_text(
+            '>ClusID 0; #Accessions 2; Structural_annotation L\n'
+            + ''.join('%s%d (0,0,START) (0,5,%s) (5,5,END)\n' % (name[0], index, label)
+                      for index, label in enumerate(labels)), encoding="utf-8")
+    for name in inputs:
+        (tmp_path / name[:-4]).mkdir()
+        completed = run_dnwa(tmp_path / name, '--engine', 'numpy', cwd=tmp_path / name[:-4])
+        assert completed.returncode == 0, completed.stdout
+    completed = run_dnwa(*inputs, '--engine', 'numpy')
+    assert completed.returncode == 0, completed.stdout
+    for name in inputs:
+        assert (outputFile(tmp_path, 'alignments_' + name)
+                == outputFile(tmp_path / name[:-4], 'alignments_'))
+
+@pytest.mark.parametrize('folder,number,same_message', ERROR_TESTS)
+def test_errors(run_dnwa,tmp_path,folder,number,same_message):
+    completed = run_dnwa(exampleInput(folder, number))
+    assert completed.returncode == 1
+    if same_message:
+        assert exampleResult(folder, number).strip() in completed.stdout
@@ -0,0 +1,44 @@
+"""Align all shards of --shard and join them with the merge command of dNWA.py."""
+
+# import modules
+import glob
+import os
+
+import pytest
+
+from conftest import exampleInput, exampleResult, outputFile
+from test_checkpoint import NEW_INPUT, OLD_INPUT
+
+def alignShards(run_dnwa,directory,number_of_shards,path,*options):
+    """Align every shard of number_of_shards of path, merge them and return the merged output."""
+    for shard in range(1, number_of_shards+1):
+        completed = run_dnwa(path, *options, '--shard', '%d/%d' % (shard, number_of_shards),
+                             cwd=directory)
+        assert completed.returncode == 0, completed.stdout
+    infos = sorted(glob.glob(os.path.join(str(directory), '*_info_shard*.json')))
+    assert len(infos) == number_of_shards
+    completed = run_dnwa('merge', *infos, cwd=directory)
+    assert completed.returncode == 0, completed.stdout
+    return outputFile(directory, 'alignments_' + os.path.basename(str(path)))
+
+@pytest.mark.parametrize('number_of_shards', [1, 2, 3, 7])
+def test_merge(run_dnwa,tmp_path,number_of_shards):
+    output = alignShards(run_dnwa, tmp_path, number_of_shards,
+                         exampleInput('implementation_tests', '08'))
+    assert output == exampleResult('implementation_tests', '08')
+
+@pytest.mark.parametrize('number_of_shards', range(2, 7))
+def test_merge_previous_with_duplicates(run_dnwa,tmp_path,number_of_shards):
+    (tmp_path / 'old.txt').write_text(OLD_INPUT, encoding="utf-8")
+    (tmp_path / 'new.txt').write_text(NEW_INPUT, encoding="utf-8")
+    for run in ('old', 'full', 'shards'):
+        (tmp_path / run).mkdir()
+    assert run_dnwa(tmp_path / 'old.txt', cwd=tmp_path / 'old').returncode == 0
+    previous = tmp_path / 'previous.txt'
+    previous.write_text(outputFile(tmp_path / 'old', 'alignments_'), encoding="utf-8")
+    completed = run_dnwa(tmp_path / 'new.txt', '--previous', previous, cwd=tmp_path / 'full')
+    assert completed.returncode == 0, completed.stdout
+
+    output = alignShards(run_dnwa, tmp_path / 'shards', number_of_shards, tmp_path / 'new.txt',
+                         '--previous', previous)
+    assert output == outputFile(tmp_path / 'full', 'alignments_')